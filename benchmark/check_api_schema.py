@@ -0,0 +1,138 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+"""Benchmark the time used by check_api_schema.
+
+Compares validating the API using the schema library with the fast
+validator, with and without a snapshot of the last validated API.
+
+Usage:
+
+    python benchmark/check_api_schema.py [path/to/wurfapi_api.json] [functions]
+
+If no path is given a synthetic API with the given number of functions
+(default 5000) is used.
+"""
+
+import os
+import json
+import sys
+import tempfile
+import time
+
+import wurfapi.check_api_schema
+
+
+def synthetic_api(functions):
+    api = {}
+
+    for index in range(functions):
+        scope = "project::detail{}".format(index % 50)
+        name = "{}::function{}()".format(scope, index)
+
+        if scope not in api:
+            api[scope] = {
+                "kind": "namespace",
+                "name": "detail{}".format(index % 50),
+                "scope": "project",
+                "inline": False,
+                "members": [],
+                "briefdescription": [],
+                "detaileddescription": [],
+            }
+
+        api[scope]["members"].append(name)
+
+        api[name] = {
+            "kind": "function",
+            "name": "function{}".format(index),
+            "scope": scope,
+            "location": {
+                "include": "project/detail.hpp",
+                "path": "src/project/detail.hpp",
+                "line": index,
+            },
+            "access": "public",
+            "is_const": False,
+            "is_constructor": False,
+            "is_destructor": False,
+            "is_explicit": False,
+            "is_inline": False,
+            "is_static": False,
+            "is_virtual": False,
+            "trailing_return": False,
+            "return": {"type": [{"value": "void"}], "description": []},
+            "parameters": [
+                {
+                    "type": [{"value": "uint32_t"}],
+                    "name": "size",
+                    "description": [[{"kind": "text", "content": "The size"}]],
+                }
+            ],
+            "briefdescription": [
+                [{"kind": "text", "content": "Brief description of the function."}]
+            ],
+            "detaileddescription": [],
+        }
+
+    api["project"] = {
+        "kind": "namespace",
+        "name": "project",
+        "scope": None,
+        "inline": False,
+        "members": ["project::detail{}".format(i) for i in range(min(functions, 50))],
+        "briefdescription": [],
+        "detaileddescription": [],
+    }
+
+    return api
+
+
+def measure(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    path = None
+    functions = 5000
+
+    for arg in sys.argv[1:]:
+        if arg.isdigit():
+            functions = int(arg)
+        else:
+            path = arg
+
+    if path:
+        with open(path, "r") as f:
+            api = json.load(f)
+    else:
+        api = synthetic_api(functions=functions)
+
+    snapshot_path = os.path.join(tempfile.mkdtemp(), "api_snapshot.json")
+
+    for name, function in [
+        (
+            "schema",
+            lambda: wurfapi.check_api_schema.check_api_schema_detailed(api=api),
+        ),
+        ("fast", lambda: wurfapi.check_api_schema.check_api_schema(api=api)),
+        (
+            "snapshot",
+            lambda: wurfapi.check_api_schema.check_api_schema(
+                api=api, snapshot_path=snapshot_path
+            ),
+        ),
+        (
+            "unchanged",
+            lambda: wurfapi.check_api_schema.check_api_schema(
+                api=api, snapshot_path=snapshot_path
+            ),
+        ),
+    ]:
+        print("{:10} {:8.3f} s ({} entries)".format(name, measure(function), len(api)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+"""Benchmark the time and peak memory used by LinkMapper.map.
+
+Compares deep copying the API and walking it once for each of the 'type',
+'briefdescription' and 'detaileddescription' keys (the approach used
+before the fused walk) with the single walk, both on a copy and in place.
+
+Usage:
+
+    python benchmark/link_mapper.py [path/to/wurfapi_api.json] [functions]
+
+If no path is given a synthetic API with the given number of functions
+(default 5000) is used.
+"""
+
+import copy
+import json
+import sys
+import time
+import tracemalloc
+
+import wurfapi.link_mapper
+
+
+class NoLinks(object):
+    def find_link(self, typename):
+        return None
+
+
+def synthetic_api(functions):
+    api = {}
+
+    for index in range(functions):
+        scope = "project::detail{}".format(index % 50)
+        name = "{}::function{}".format(scope, index)
+
+        api[name] = {
+            "kind": "function",
+            "scope": scope,
+            "return": {
+                "type": [{"value": "const std::vector<project::buffer>&"}],
+                "description": [],
+            },
+            "parameters": [
+                {
+                    "type": [{"value": "uint32_t"}],
+                    "name": "size",
+                    "description": [
+                        [{"kind": "text", "content": "The size of project::buffer"}]
+                    ],
+                },
+                {
+                    "type": [{"value": "std::function<void(project::buffer*)>"}],
+                    "name": "callback",
+                    "description": [],
+                },
+            ],
+            "briefdescription": [
+                [{"kind": "text", "content": "Brief description of the function."}]
+            ],
+            "detaileddescription": [
+                [
+                    {"kind": "text", "content": "Uses project::buffer, see"},
+                    {"kind": "code", "content": "project::buffer b;"},
+                ]
+            ],
+        }
+
+    api["project::buffer"] = {"kind": "class", "scope": "project"}
+
+    return api
+
+
+def old_map(mapper):
+    mapped_api = copy.deepcopy(mapper.api)
+
+    for key, function in [
+        ("type", mapper._map_type),
+        ("briefdescription", mapper._map_paragraphs),
+        ("detaileddescription", mapper._map_paragraphs),
+    ]:
+        wurfapi.link_mapper.transform_key(
+            data=mapped_api, search_key=key, scope=None, function=function
+        )
+
+    return mapped_api
+
+
+def measure(api, function):
+    # Each run gets its own copy of the API, so the in place mapping
+    # always starts from the unmapped API. Tracing the allocations slows
+    # down the mapping, so the time and peak memory are measured in
+    # separate runs.
+    seconds = None
+
+    for _ in range(3):
+        mapper = wurfapi.link_mapper.LinkMapper(
+            api=copy.deepcopy(api), link_provider=NoLinks()
+        )
+
+        start = time.perf_counter()
+        result = function(mapper)
+        elapsed = time.perf_counter() - start
+
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+
+    mapper = wurfapi.link_mapper.LinkMapper(
+        api=copy.deepcopy(api), link_provider=NoLinks()
+    )
+
+    tracemalloc.start()
+    function(mapper)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, peak, result
+
+
+def main():
+    path = None
+    functions = 5000
+
+    for arg in sys.argv[1:]:
+        if arg.isdigit():
+            functions = int(arg)
+        else:
+            path = arg
+
+    if path:
+        with open(path, "r") as f:
+            api = json.load(f)
+    else:
+        api = synthetic_api(functions=functions)
+
+    results = []
+
+    for name, function in [
+        ("old", old_map),
+        ("fused", lambda mapper: mapper.map()),
+        ("in_place", lambda mapper: mapper.map(in_place=True)),
+    ]:
+        seconds, peak, result = measure(api=api, function=function)
+        results.append(result)
+
+        print(
+            "{:10} {:8.3f} s {:10.1f} MiB peak ({} entries)".format(
+                name, seconds, peak / 2.0**20, len(api)
+            )
+        )
+
+    assert all(result == results[0] for result in results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+"""Benchmark the per-element overhead of DoxygenParser.parse_element.
+
+Compares finding the parser function with a linear scan and
+inspect.getfullargspec (the approach used before the dispatch index) with
+the dispatch index and the precomputed arguments.
+
+Usage:
+
+    python benchmark/parser_dispatch.py path/to/doxygen/xml
+
+If no path is given a small synthetic XML tree is used.
+"""
+
+import glob
+import inspect
+import logging
+import os
+import sys
+import timeit
+
+import lxml.etree
+
+import wurfapi.doxygen_parser
+
+
+def load_elements(xml_path):
+    if xml_path is None:
+        xml = "<compounddef kind='class'>{}</compounddef>".format(
+            "<sectiondef kind='func'><memberdef kind='function'>"
+            "<type>int</type><location file='a.h'/><briefdescription>"
+            "<para>Brief <bold>text</bold></para></briefdescription>"
+            "</memberdef></sectiondef>" * 1000
+        )
+        return list(lxml.etree.fromstring(xml).iter())
+
+    elements = []
+
+    for path in glob.glob(os.path.join(xml_path, "*.xml")):
+        elements += list(lxml.etree.parse(path).iter())
+
+    return elements
+
+
+def main():
+    xml_path = sys.argv[1] if len(sys.argv) > 1 else None
+
+    parser = wurfapi.doxygen_parser.DoxygenParser(
+        doxygen_path=xml_path,
+        location_mapper=None,
+        patch_api=[],
+        log=logging.getLogger(__name__),
+    )
+
+    elements = [e for e in load_elements(xml_path) if parser.supports(xml=e)]
+
+    def scan():
+        for element in elements:
+            function = parser._find_in_list(xml=element).function
+            inspect.getfullargspec(function)
+
+    def dispatch():
+        for element in elements:
+            parser._find_parser(xml=element).arguments
+
+    for name, function in [("scan", scan), ("dispatch", dispatch)]:
+        seconds = min(timeit.repeat(function, number=1, repeat=5))
+
+        print(
+            "{:10} {:8.2f} us/element ({} elements)".format(
+                name, seconds / len(elements) * 1e6, len(elements)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
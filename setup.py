@@ -107,7 +107,7 @@ setup(
     # documentation on this:
     # http://setuptools.readthedocs.io/en/latest/setuptools.html#including-data-files
     #
-    package_data={"wurfapi": ["template_files/*"]},
+    package_data={"wurfapi": ["template_files/*", "link_files/*"]},
     install_requires=[
         "pyquery",
         "python-archive",
@@ -1,14 +1,64 @@
+import os
+import json
+import hashlib
+
 import schema
 import six
 
+from . import selector_index
+
 
-def check_api_schema(api):
+def check_api_schema(api, snapshot_path=None):
     """Checks the schema of the API and raises exceptions if something
     does not match.
 
+    The API is checked using the fast validator. Only if it finds a problem
+    do we run the schema validation, which gives a detailed error message.
+
     :param api: The API dictionary
+    :param snapshot_path: Path to a file storing a snapshot of the last
+        validated API or None. If given, only the entries changed since the
+        snapshot are validated. Computing the snapshot takes about as long
+        as validating the API, so this only pays off if the snapshot is
+        reused for other purposes or the checks become more expensive.
     """
 
+    digests = None
+    selectors = api
+
+    if snapshot_path:
+        digests = _digests(api=api)
+        snapshot = _load_snapshot(snapshot_path=snapshot_path)
+
+        # Entries link to other entries, so if an entry was removed every
+        # entry must be validated again
+        if snapshot is not None and set(snapshot).issubset(digests):
+            selectors = [
+                selector
+                for selector, digest in digests.items()
+                if digest is None or snapshot[selector] != digest
+            ]
+
+    if not validate(api=api, selectors=selectors):
+        check_api_schema_detailed(api=api)
+
+    if snapshot_path:
+        _store_snapshot(snapshot_path=snapshot_path, digests=digests)
+
+
+def check_api_schema_detailed(api):
+    """Checks the schema of the API using the schema library and raises
+    exceptions if something does not match.
+
+    This is slower than the fast validator, but gives detailed error
+    messages.
+
+    :param api: The API dictionary
+    """
+
+    # Used for suggesting the selectors closest to a missing one
+    suggestions = selector_index.SelectorIndex(selectors=api)
+
     # Schema for checking we have a string in a Python 2 and 3 compatible way
 
     # Link schema
@@ -39,7 +89,7 @@ def check_api_schema(api):
             if data not in self.api:
                 raise schema.SchemaError(
                     "%r not found in the API "
-                    "valid keys are %r" % (data, self.api.keys())
+                    "closest matches are %r" % (data, suggestions.suggest(data))
                 )
 
             return data
@@ -66,7 +116,8 @@ def check_api_schema(api):
             if data["value"] not in self.api:
                 raise schema.SchemaError(
                     "Link value %r not found in the API "
-                    "valid keys are %r" % (data, self.api.keys())
+                    "closest matches are %r"
+                    % (data, suggestions.suggest(data["value"]))
                 )
 
             return data
@@ -328,3 +379,429 @@ def check_api_schema(api):
             return api_schemas[data["kind"]].validate(data)
 
     schema.Schema({str: SchemaApi()}).validate(api)
+
+
+# The fast validator. Each check returns True if the data is valid and
+# False otherwise. The checks mirror the schemas in
+# check_api_schema_detailed, which is used for reporting the errors.
+
+
+def _is_string(data, api):
+    return isinstance(data, six.string_types) and len(data) > 0
+
+
+def _is_optional_string(data, api):
+    return data is None or _is_string(data=data, api=api)
+
+
+def _is_bool(data, api):
+    return isinstance(data, bool)
+
+
+def _is_int(data, api):
+    return isinstance(data, int) and not isinstance(data, bool)
+
+
+def _is_access(data, api):
+    return data in ("public", "protected", "private")
+
+
+def _literal(*values):
+    def check(data, api):
+        return any(data == value for value in values)
+
+    return check
+
+
+def _list_of(item):
+    def check(data, api):
+        if not isinstance(data, list):
+            return False
+
+        for element in data:
+            if not item(data=element, api=api):
+                return False
+
+        return True
+
+    return check
+
+
+def _dict_of(required, optional=None):
+    """Create a check for a dict with the given keys.
+
+    :param required: Dict mapping the required keys to their checks
+    :param optional: Dict mapping the optional keys to their checks
+    """
+    checks = dict(required)
+    checks.update(optional or {})
+
+    def check(data, api):
+        if not isinstance(data, dict):
+            return False
+
+        found = 0
+
+        for key, value in data.items():
+            try:
+                value_check = checks[key]
+            except (KeyError, TypeError):
+                return False
+
+            if not value_check(data=value, api=api):
+                return False
+
+            if key in required:
+                found += 1
+
+        return found == len(required)
+
+    return check
+
+
+def _is_member(data, api):
+    try:
+        return data in api
+    except TypeError:
+        return False
+
+
+def _is_link(data, api):
+    if not isinstance(data, dict) or len(data) != 2:
+        return False
+
+    if "url" not in data or "value" not in data:
+        return False
+
+    url = data["url"]
+    value = data["value"]
+
+    if not isinstance(url, bool) or not _is_string(data=value, api=api):
+        return False
+
+    return url or value in api
+
+
+def _is_paragraph_element(data, api):
+    if not isinstance(data, dict):
+        return False
+
+    kind = data.get("kind")
+
+    if kind == "text":
+        for key, value in data.items():
+            if key == "content":
+                if not _is_string(data=value, api=api):
+                    return False
+            elif key == "link":
+                if not _is_link(data=value, api=api):
+                    return False
+            elif key != "kind":
+                return False
+
+        return "content" in data
+
+    if kind == "code":
+        return (
+            len(data) == 3
+            and _is_string(data=data.get("content"), api=api)
+            and isinstance(data.get("is_block"), bool)
+        )
+
+    if kind == "bold" or kind == "italic":
+        return len(data) == 2 and _is_string(data=data.get("content"), api=api)
+
+    if kind == "list":
+        return (
+            len(data) == 3
+            and isinstance(data.get("ordered"), bool)
+            and "items" in data
+            and _is_list_items(data=data["items"], api=api)
+        )
+
+    return False
+
+
+def _is_paragraphs(data, api):
+    if not isinstance(data, list):
+        return False
+
+    for paragraph in data:
+        if not isinstance(paragraph, list):
+            return False
+
+        for element in paragraph:
+            if not _is_paragraph_element(data=element, api=api):
+                return False
+
+    return True
+
+
+_is_list_items = _list_of(_is_paragraphs)
+
+
+def _is_type(data, api):
+    if not isinstance(data, list):
+        return False
+
+    for item in data:
+        if not isinstance(item, dict) or not _is_string(
+            data=item.get("value"), api=api
+        ):
+            return False
+
+        if len(item) == 1:
+            continue
+
+        if len(item) != 2 or not _is_link(data=item.get("link"), api=api):
+            return False
+
+    return True
+
+
+_is_location = _dict_of(
+    required={"path": _is_string, "line": _is_int},
+    optional={"include": _is_string},
+)
+
+_is_parameter = _dict_of(
+    required={"type": _is_type},
+    optional={"name": _is_string, "description": _is_paragraphs},
+)
+
+_is_template_parameters = _list_of(
+    _dict_of(
+        required={"type": _is_type, "name": _is_string},
+        optional={"default": _is_type, "description": _is_paragraphs},
+    )
+)
+
+_is_macro_parameters = _list_of(
+    _dict_of(required={"name": _is_string}, optional={"description": _is_paragraphs})
+)
+
+_is_namespace = _dict_of(
+    required={
+        "kind": _literal("namespace"),
+        "name": _is_string,
+        "scope": _is_optional_string,
+        "members": _list_of(_is_member),
+        "briefdescription": _is_paragraphs,
+        "detaileddescription": _is_paragraphs,
+        "inline": _is_bool,
+    }
+)
+
+_is_class_struct = _dict_of(
+    required={
+        "kind": _literal("class", "struct"),
+        "name": _is_string,
+        "location": _is_location,
+        "scope": _is_optional_string,
+        "access": _is_access,
+        "members": _list_of(_is_member),
+        "briefdescription": _is_paragraphs,
+        "detaileddescription": _is_paragraphs,
+    },
+    optional={"template_parameters": _is_template_parameters},
+)
+
+_is_enum = _dict_of(
+    required={
+        "kind": _literal("enum"),
+        "name": _is_string,
+        "location": _is_location,
+        "scope": _is_optional_string,
+        "access": _is_access,
+        "values": _list_of(
+            _dict_of(
+                required={
+                    "name": _is_string,
+                    "briefdescription": _is_paragraphs,
+                    "detaileddescription": _is_paragraphs,
+                },
+                optional={"value": _is_string},
+            )
+        ),
+        "briefdescription": _is_paragraphs,
+        "detaileddescription": _is_paragraphs,
+    }
+)
+
+_is_file = _dict_of(
+    required={"kind": _literal("file"), "name": _is_string, "path": _is_string}
+)
+
+_is_typedef_using = _dict_of(
+    required={
+        "kind": _literal("typedef", "using"),
+        "name": _is_string,
+        "location": _is_location,
+        "scope": _is_optional_string,
+        "access": _is_access,
+        "type": _is_type,
+        "briefdescription": _is_paragraphs,
+        "detaileddescription": _is_paragraphs,
+    },
+    optional={"parameters": _is_macro_parameters},
+)
+
+_is_define = _dict_of(
+    required={
+        "kind": _literal("define"),
+        "name": _is_string,
+        "location": _is_location,
+        "briefdescription": _is_paragraphs,
+        "detaileddescription": _is_paragraphs,
+    },
+    optional={"initializer": _is_string, "parameters": _is_macro_parameters},
+)
+
+_is_function = _dict_of(
+    required={
+        "kind": _literal("function"),
+        "name": _is_string,
+        "location": _is_location,
+        "scope": _is_optional_string,
+        "trailing_return": _is_bool,
+        "is_const": _is_bool,
+        "is_static": _is_bool,
+        "is_virtual": _is_bool,
+        "is_explicit": _is_bool,
+        "is_inline": _is_bool,
+        "is_constructor": _is_bool,
+        "is_destructor": _is_bool,
+        "access": _is_access,
+        "briefdescription": _is_paragraphs,
+        "detaileddescription": _is_paragraphs,
+        "parameters": _list_of(_is_parameter),
+    },
+    optional={
+        "return": _dict_of(required={"type": _is_type, "description": _is_paragraphs}),
+        "template_parameters": _is_template_parameters,
+    },
+)
+
+_is_variable = _dict_of(
+    required={
+        "kind": _literal("variable"),
+        "name": _is_string,
+        "type": _is_type,
+        "location": _is_location,
+        "is_static": _is_bool,
+        "is_mutable": _is_bool,
+        "is_volatile": _is_bool,
+        "is_const": _is_bool,
+        "is_constexpr": _is_bool,
+        "scope": _is_optional_string,
+        "access": _is_access,
+        "briefdescription": _is_paragraphs,
+        "detaileddescription": _is_paragraphs,
+    },
+    optional={"value": _is_string},
+)
+
+_entry_checks = {
+    "namespace": _is_namespace,
+    "file": _is_file,
+    "class": _is_class_struct,
+    "struct": _is_class_struct,
+    "enum": _is_enum,
+    "typedef": _is_typedef_using,
+    "using": _is_typedef_using,
+    "function": _is_function,
+    "variable": _is_variable,
+    "define": _is_define,
+}
+
+
+def validate(api, selectors=None):
+    """Check the API using the fast validator.
+
+    :param api: The API dictionary
+    :param selectors: The entries to check or None to check all entries
+    :return: True if the API is valid otherwise False
+    """
+    if not isinstance(api, dict):
+        return False
+
+    if selectors is None:
+        selectors = api
+
+    for selector in selectors:
+        if not isinstance(selector, str):
+            return False
+
+        entry = api[selector]
+
+        try:
+            entry_check = _entry_checks[entry["kind"]]
+        except (KeyError, TypeError):
+            return False
+
+        if not entry_check(data=entry, api=api):
+            return False
+
+    return True
+
+
+def _digests(api):
+    """Compute a digest of each entry in the API.
+
+    :param api: The API dictionary
+    :return: Dict mapping the selectors to the digests. The digest is None
+        for entries which cannot be serialized.
+    """
+    digests = {}
+
+    for selector, entry in api.items():
+        try:
+            data = json.dumps(entry, sort_keys=True)
+        except (TypeError, ValueError):
+            digests[selector] = None
+            continue
+
+        digests[selector] = hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    return digests
+
+
+def _configuration():
+    # The snapshot is only valid for the same checks
+    with open(__file__, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _load_snapshot(snapshot_path):
+    """Load the digests of the last validated API.
+
+    :param snapshot_path: The path to the snapshot file
+    :return: The digests or None if there is no usable snapshot
+    """
+    if not os.path.isfile(snapshot_path):
+        return None
+
+    try:
+        with open(snapshot_path, "r") as f:
+            snapshot = json.load(f)
+    except ValueError:
+        return None
+
+    if snapshot.get("configuration") != _configuration():
+        return None
+
+    return snapshot["digests"]
+
+
+def _store_snapshot(snapshot_path, digests):
+    directory = os.path.dirname(snapshot_path)
+
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    # Write to a temporary file first such that an interrupted build does
+    # not leave a partial snapshot
+    with open(snapshot_path + ".tmp", "w") as f:
+        json.dump({"configuration": _configuration(), "digests": digests}, f)
+
+    os.replace(snapshot_path + ".tmp", snapshot_path)
@@ -1,6 +1,8 @@
 import schema
 import six
 
+from . import selector_index
+
 # We want to collapse inline namespaces in "most" to "least" nested. This
 # ensures we have a stable scope prefix to look for.
 #
@@ -82,6 +84,83 @@ def update_scope(api, from_scope, to_scope):
     return _update(api)
 
 
+class ScopeRewriter(object):
+    def __init__(self, rewrites):
+        """Apply a sequence of scope rewrites to strings in one go.
+
+        Applying the rewrites one by one to a string gives the same result
+        as calling update_scope(...) once for each rewrite. Instead of
+        checking every rewrite we look up the from scopes which are a
+        prefix of the string in a trie.
+
+        :param rewrites: List of (from_scope, to_scope) tuples in the order
+            they should be applied
+        """
+        self.rewrites = rewrites
+
+        # Character trie of the from scopes. The None key of a node holds
+        # the indices of the rewrites with a from scope ending at the node.
+        self.trie = {}
+
+        for index, (from_scope, _) in enumerate(rewrites):
+            node = self.trie
+
+            for character in from_scope:
+                node = node.setdefault(character, {})
+
+            node.setdefault(None, []).append(index)
+
+        # The same scopes are found over and over again in the API
+        self.cache = {}
+
+    def rewrite(self, value):
+        """:return: The value with all the rewrites applied"""
+
+        try:
+            return self.cache[value]
+        except KeyError:
+            pass
+
+        result = value
+
+        # The index of the next rewrite that may be applied
+        position = 0
+
+        while True:
+            index = self._next_match(value=result, position=position)
+
+            if index is None:
+                break
+
+            from_scope, to_scope = self.rewrites[index]
+            result = to_scope + result[len(from_scope) :]
+            position = index + 1
+
+        self.cache[value] = result
+        return result
+
+    def _next_match(self, value, position):
+        """Find the first rewrite from position where the from scope is a
+        prefix of the value.
+
+        :return: The index of the rewrite or None
+        """
+        found = None
+        node = self.trie
+
+        for character in value:
+            node = node.get(character)
+
+            if node is None:
+                break
+
+            for index in node.get(None, []):
+                if index >= position and (found is None or index < found):
+                    found = index
+
+        return found
+
+
 def collapse_inline_namespaces(api, selectors):
     """Collapses inline namespaces.
 
@@ -89,6 +168,10 @@ def collapse_inline_namespaces(api, selectors):
     1. Remove the name of the inline namespace in the scope of the members.
     2. Removing any namespaces that are marked inline.
 
+    The members of the inline namespaces are moved first. Then the scopes
+    are updated in a single pass over the API, giving the same result as
+    calling update_scope(...) for each selector in turn.
+
     :param api: The API dictionary
     :param selectors: A list of inline namespaces that should be collapsed
     :return: An API dictionary with the inline namespace collapsed.
@@ -97,15 +180,19 @@ def collapse_inline_namespaces(api, selectors):
     # Sort the selectors to get the most nested namespace first
     selectors.sort(key=len, reverse=True)
 
+    rewrites = []
+
     for selector in selectors:
 
         if selector not in api:
             raise RuntimeError(
                 "Could not find {} selector in API. "
-                "Available selectors are: {}".format(selector, api.keys())
+                "Closest matches are: {}".format(
+                    selector, selector_index.suggest(selectors=api, selector=selector)
+                )
             )
 
-        # Make sapi[selector]e selecting an inline namespace
+        # Make sure we are selecting an inline namespace
         schema.Schema(
             {"kind": "namespace", "inline": True}, ignore_extra_keys=True
         ).validate(api[selector])
@@ -129,7 +216,9 @@ def collapse_inline_namespaces(api, selectors):
             from_scope = selector + "::"
             to_scope = ""
 
-        # Remove references to it
+        # Remove references to it. The more nested selectors are collapsed
+        # first, so neither the selector nor its scope have been renamed by
+        # the rewrites before this one.
         if to_scope:
             api[to_scope]["members"].remove(selector)
             api[to_scope]["members"] += api[selector]["members"]
@@ -137,7 +226,36 @@ def collapse_inline_namespaces(api, selectors):
         # Remove the inline namespace from the API
         del api[selector]
 
-        # Collapse all scopes in the API
-        api = update_scope(api=api, from_scope=from_scope, to_scope=to_scope)
+        rewrites.append((from_scope, to_scope))
+
+    if not rewrites:
+        return api
+
+    rewriter = ScopeRewriter(rewrites=rewrites)
+
+    def _update(value):
+        if isinstance(value, dict):
+
+            result = {}
+
+            for old_key, old_value in value.items():
+
+                new_key = _update(value=old_key)
+                new_value = _update(value=old_value)
+
+                assert new_key not in result
+
+                result[new_key] = new_value
+
+            return result
+
+        if isinstance(value, list):
+            return [_update(v) for v in value]
+
+        if isinstance(value, six.string_types):
+            return rewriter.rewrite(value=value)
+
+        return value
 
-    return api
+    # Collapse all scopes in the API
+    return _update(api)
@@ -0,0 +1,127 @@
+import os
+import shutil
+import hashlib
+
+
+def source_files(source_paths, recursive):
+    """Find the files Doxygen will see when given the source paths.
+
+    We do not try to replicate Doxygen's FILE_PATTERNS here. Every file
+    found is included, which at worst makes the cache miss a bit more
+    often than strictly needed.
+
+    :param source_paths: List of files or directories as strings
+    :param recursive: If True we recurse into sub directories
+    :return: Sorted list of file paths
+    """
+    files = []
+
+    for source_path in source_paths:
+        if os.path.isfile(source_path):
+            files.append(source_path)
+            continue
+
+        for root, dirs, filenames in os.walk(source_path):
+            files += [os.path.join(root, f) for f in filenames]
+
+            if not recursive:
+                break
+
+    return sorted(files)
+
+
+class DoxygenCache(object):
+    def __init__(self, cache_path, log):
+        """Persistent cache for the Doxygen XML output.
+
+        The cache stores the XML from a single Doxygen run under a key
+        computed from all the inputs to Doxygen. If the key matches on the
+        next build we can reuse the XML without invoking Doxygen.
+
+        :param cache_path: The directory where the cached XML is stored.
+        :param log: Log object
+        """
+        self.cache_path = cache_path
+        self.log = log
+
+    def key(
+        self, source_paths, recursive, doxyfile, doxygen_version, version, tagfiles=()
+    ):
+        """Compute the cache key.
+
+        :param source_paths: The source paths passed to Doxygen
+        :param recursive: Whether Doxygen recursively scans the source paths
+        :param doxyfile: The content of the Doxyfile as a string
+        :param doxygen_version: The Doxygen version as a string
+        :param version: The wurfapi version as a string
+        :param tagfiles: The Doxygen tag files passed to Doxygen. The
+            references Doxygen marks as external depend on the content of
+            these.
+        :return: The key as a hex string
+        """
+        sha1 = hashlib.sha1()
+
+        for value in [doxyfile, doxygen_version, version]:
+            sha1.update(value.encode("utf-8"))
+            sha1.update(b"\0")
+
+        files = source_files(source_paths=source_paths, recursive=recursive)
+
+        for path in files + sorted(tagfiles):
+            sha1.update(path.encode("utf-8"))
+            sha1.update(b"\0")
+
+            with open(path, "rb") as f:
+                sha1.update(hashlib.sha1(f.read()).digest())
+
+        return sha1.hexdigest()
+
+    def lookup(self, key):
+        """Look for cached XML.
+
+        :param key: The key returned by key(...)
+        :return: Path to the cached XML directory or None
+        """
+        xml_path = os.path.join(self.cache_path, key, "xml")
+
+        if not os.path.isfile(os.path.join(xml_path, "index.xml")):
+            self.log.debug("Doxygen cache miss %s", key)
+            return None
+
+        self.log.debug("Doxygen cache hit %s", key)
+        return xml_path
+
+    def store(self, key, xml_path):
+        """Store the XML in the cache.
+
+        Only the latest Doxygen output is kept, any other entries in the
+        cache directory are removed.
+
+        :param key: The key returned by key(...)
+        :param xml_path: The directory containing the Doxygen XML
+        :return: Path to the cached XML directory
+        """
+        entry_path = os.path.join(self.cache_path, key)
+
+        # Copy to a temporary location first such that an interrupted
+        # build does not leave a partial entry which lookup(...) would
+        # accept.
+        temp_path = entry_path + ".tmp"
+
+        if os.path.isdir(temp_path):
+            shutil.rmtree(temp_path)
+
+        shutil.copytree(xml_path, os.path.join(temp_path, "xml"))
+
+        if os.path.isdir(entry_path):
+            shutil.rmtree(entry_path)
+
+        os.rename(temp_path, entry_path)
+
+        for name in os.listdir(self.cache_path):
+            if name == key:
+                continue
+
+            shutil.rmtree(os.path.join(self.cache_path, name), ignore_errors=True)
+
+        return os.path.join(entry_path, "xml")
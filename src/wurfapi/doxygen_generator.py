@@ -1,8 +1,13 @@
 import os
+import json
 import shutil
+import hashlib
 import pprint
+import concurrent.futures
 
+import wurfapi.doxygen_cache
 import wurfapi.doxygen_error
+import wurfapi.doxygen_merge
 
 # Doxygen uses the Doxyfile as configuration file. You can read more
 # about it here:
@@ -16,6 +21,7 @@ GENERATE_RTF     = NO
 CASE_SENSE_NAMES = NO
 RECURSIVE        = {recursive}
 INPUT            = {source_path}
+FILE_PATTERNS    = {file_patterns}
 ENABLE_PREPROCESSING = YES
 QUIET            = YES
 JAVADOC_AUTOBRIEF = NO
@@ -25,6 +31,59 @@ XML_OUTPUT = xml
 {extra}
 """.strip()
 
+# The extensions of the files Doxygen reads from the source directories.
+# This is Doxygen's default FILE_PATTERNS, we pass it explicitly such that
+# the files we hash for the incremental runs are the files Doxygen reads
+# whatever the Doxygen version.
+FILE_PATTERNS = [
+    ".c",
+    ".cc",
+    ".cxx",
+    ".cpp",
+    ".c++",
+    ".java",
+    ".ii",
+    ".ixx",
+    ".ipp",
+    ".i++",
+    ".inl",
+    ".idl",
+    ".ddl",
+    ".odl",
+    ".h",
+    ".hh",
+    ".hxx",
+    ".hpp",
+    ".h++",
+    ".cs",
+    ".d",
+    ".php",
+    ".php4",
+    ".php5",
+    ".phtml",
+    ".inc",
+    ".m",
+    ".markdown",
+    ".md",
+    ".mm",
+    ".dox",
+    ".py",
+    ".pyw",
+    ".f90",
+    ".f95",
+    ".f03",
+    ".f08",
+    ".f",
+    ".for",
+    ".tcl",
+    ".vhd",
+    ".vhdl",
+    ".ucf",
+    ".qsf",
+    ".as",
+    ".js",
+]
+
 
 class DoxygenGenerator(object):
     def __init__(
@@ -35,6 +94,9 @@ class DoxygenGenerator(object):
         source_paths,
         output_path,
         warnings_as_error,
+        incremental=False,
+        shards=1,
+        tagfiles=None,
     ):
         """Generate the doxygen XML.
 
@@ -46,6 +108,15 @@ class DoxygenGenerator(object):
         :param warnings_as_errors: If True we raise an error if Doxygen
             produces any warnings. If False we ignore any Doxygen
             warnings.
+        :param incremental: If True we reuse the XML from a previous run in
+            the output_path and only run Doxygen on the changed files.
+        :param shards: The number of Doxygen processes to run in parallel.
+            The source files are split between the processes and the XML
+            is merged afterwards.
+        :param tagfiles: List of Doxygen tag files of the projects we
+            depend on. Doxygen marks the references to the types in these
+            as external, instead of us having to add the dependencies to the
+            source paths.
         """
         self.doxygen_executable = doxygen_executable
         self.runner = runner
@@ -53,6 +124,9 @@ class DoxygenGenerator(object):
         self.source_paths = source_paths
         self.output_path = output_path
         self.warnings_as_error = warnings_as_error
+        self.incremental = incremental
+        self.shards = shards
+        self.tagfiles = tagfiles if tagfiles else []
 
         assert type(self.source_paths) is list
 
@@ -60,6 +134,10 @@ class DoxygenGenerator(object):
             assert os.path.exists(path)
 
         assert os.path.isdir(self.output_path)
+        assert self.shards >= 1
+
+        for path in self.tagfiles:
+            assert os.path.isfile(path)
 
     def generate(self):
         """Generate the Doxygen XML.
@@ -71,16 +149,88 @@ class DoxygenGenerator(object):
         :return: The path to the generated XML
         """
 
-        # Write Doxyfile
-        doxyfile_content = DOXYFILE_TEMPLATE.format(
-            name="wurfapi",
+        if self.incremental:
+            return self._generate_incremental()
+
+        return self._generate_full()
+
+    def doxyfile(self):
+        """Render the Doxyfile used when running Doxygen.
+
+        :return: The content of the Doxyfile as a string
+        """
+        return self._doxyfile(
+            source_paths=self.source_paths,
+            recursive=self.recursive,
             output_path=self.output_path,
-            source_path=" ".join(self.source_paths),
-            recursive="YES" if self.recursive else "NO",
-            extra="",
         )
 
-        doxyfile_path = os.path.join(self.output_path, "Doxyfile")
+    def version(self):
+        """Ask Doxygen for its version.
+
+        :return: The version as a string e.g. "1.8.12"
+        """
+        result = self.runner.run(
+            command=self.doxygen_executable + " --version", cwd=self.output_path
+        )
+
+        return str(result.stdout).strip()
+
+    def input_files(self):
+        """Find the source files Doxygen will parse.
+
+        Files in the source directories are filtered using FILE_PATTERNS,
+        files passed directly as source paths are always included. The
+        Doxyfile sets CASE_SENSE_NAMES = NO, so Doxygen matches the patterns
+        ignoring case.
+
+        :return: Sorted list of file paths
+        """
+        files = []
+
+        for path in wurfapi.doxygen_cache.source_files(
+            source_paths=self.source_paths, recursive=self.recursive
+        ):
+            if path in self.source_paths:
+                files.append(path)
+                continue
+
+            _, extension = os.path.splitext(path)
+
+            if extension.lower() in FILE_PATTERNS:
+                files.append(path)
+
+        return files
+
+    def _doxyfile(self, source_paths, recursive, output_path):
+        extra = []
+
+        if self.tagfiles:
+            extra.append("TAGFILES = " + " ".join(self.tagfiles))
+
+        return DOXYFILE_TEMPLATE.format(
+            name="wurfapi",
+            output_path=output_path,
+            source_path=" ".join(source_paths),
+            file_patterns=" ".join("*" + e for e in FILE_PATTERNS),
+            recursive="YES" if recursive else "NO",
+            extra="\n".join(extra),
+        )
+
+    def _run(self, source_paths, recursive, output_path):
+        """Run Doxygen
+
+        :return: The path to the generated XML
+        """
+
+        # Write Doxyfile
+        doxyfile_content = self._doxyfile(
+            source_paths=source_paths,
+            recursive=recursive,
+            output_path=output_path,
+        )
+
+        doxyfile_path = os.path.join(output_path, "Doxyfile")
         with open(doxyfile_path, "w") as doxyfile:
 
             doxyfile.write(doxyfile_content)
@@ -89,7 +239,7 @@ class DoxygenGenerator(object):
         #        propagate these somehow - if you want to know what
         #        has not been documented etc.
         result = self.runner.run(
-            command=self.doxygen_executable + " Doxyfile", cwd=self.output_path
+            command=self.doxygen_executable + " Doxyfile", cwd=output_path
         )
 
         # Doxygen reports warnings on stderr. So if we have some output
@@ -101,7 +251,222 @@ class DoxygenGenerator(object):
 
         # The Doxygen XML is written to the 'xml' subfolder of the
         # output directory
-        return os.path.join(self.output_path, "xml")
+        return os.path.join(output_path, "xml")
+
+    def _generate_full(self):
+        """Run Doxygen on all the source files.
+
+        :return: The path to the generated XML
+        """
+        if self.shards > 1:
+            return self._generate_sharded()
+
+        return self._run(
+            source_paths=self.source_paths,
+            recursive=self.recursive,
+            output_path=self.output_path,
+        )
+
+    def _generate_sharded(self):
+        """Run Doxygen in parallel on subsets of the source files.
+
+        Headers and source files sharing a name in the same directory e.g.
+        coffee.hpp and coffee.cpp are kept in the same shard, such that
+        members defined outside the class are documented together with
+        the class. The shards are balanced using the file sizes.
+
+        :return: The path to the generated XML
+        """
+        units = {}
+
+        for path in self.input_files():
+            stem, _ = os.path.splitext(path)
+            units.setdefault(stem, []).append(path)
+
+        # Place the largest units first, each in the currently smallest shard
+        shards = [[] for _ in range(self.shards)]
+        sizes = [0] * self.shards
+
+        for files in sorted(
+            units.values(),
+            key=lambda files: sum(os.path.getsize(f) for f in files),
+            reverse=True,
+        ):
+            index = sizes.index(min(sizes))
+            shards[index] += files
+            sizes[index] += sum(os.path.getsize(f) for f in files)
+
+        shards = [sorted(files) for files in shards if files]
+
+        # Without any input files there is nothing to split
+        if not shards:
+            return self._run(
+                source_paths=self.source_paths,
+                recursive=self.recursive,
+                output_path=self.output_path,
+            )
+
+        xml_path = os.path.join(self.output_path, "xml")
+
+        if os.path.isdir(xml_path):
+            shutil.rmtree(xml_path)
+
+        def run_shard(index):
+            shard_path = os.path.join(self.output_path, "shard-{}".format(index))
+
+            if os.path.isdir(shard_path):
+                shutil.rmtree(shard_path)
+            os.makedirs(shard_path)
+
+            return self._run(
+                source_paths=shards[index],
+                recursive=False,
+                output_path=shard_path,
+            )
+
+        # Doxygen does the work in a separate process, so threads are enough
+        # to run the shards in parallel
+        with concurrent.futures.ThreadPoolExecutor(len(shards)) as executor:
+            shard_xmls = list(executor.map(run_shard, range(len(shards))))
+
+            shard_xmls = [
+                wurfapi.doxygen_merge.DoxygenXml(xml_path=shard_xml)
+                for shard_xml in shard_xmls
+            ]
+
+            # Each Doxygen process leaves the words naming something from
+            # the other shards as plain text, link these as a single run
+            # would have done
+            names = {}
+            for shard_xml in shard_xmls:
+                for name, target in wurfapi.doxygen_merge.link_names(
+                    xml=shard_xml
+                ).items():
+                    names.setdefault(name, target)
+
+            list(
+                executor.map(
+                    lambda shard_xml: wurfapi.doxygen_merge.relink(
+                        xml=shard_xml, names=names
+                    ),
+                    shard_xmls,
+                )
+            )
+
+        xml = wurfapi.doxygen_merge.DoxygenXml(xml_path=xml_path)
+
+        for shard_xml in shard_xmls:
+            wurfapi.doxygen_merge.merge(into=xml, other=shard_xml)
+
+        wurfapi.doxygen_merge.reconcile(
+            xml=wurfapi.doxygen_merge.DoxygenXml(xml_path=xml_path)
+        )
+
+        return xml_path
+
+    def _generate_incremental(self):
+        """Run Doxygen only on the files changed since the last run.
+
+        We store a manifest next to the XML with the hash of every source
+        file and the source files each compound was generated from. When a
+        file changes we remove the compounds generated from it, run
+        Doxygen on the files needed to regenerate these compounds and merge
+        the result into the existing XML.
+
+        :return: The path to the generated XML
+        """
+        xml_path = os.path.join(self.output_path, "xml")
+        manifest_path = os.path.join(self.output_path, "manifest.json")
+
+        files = {}
+        for path in self.input_files():
+            with open(path, "rb") as f:
+                files[wurfapi.doxygen_merge.normalize_path(path)] = hashlib.sha1(
+                    f.read()
+                ).hexdigest()
+
+        # The manifest is only valid for the same Doxygen configuration
+        configuration = self.doxyfile() + self.version()
+
+        for path in self.tagfiles:
+            with open(path, "rb") as f:
+                configuration += hashlib.sha1(f.read()).hexdigest()
+
+        manifest = None
+        if os.path.isfile(manifest_path) and os.path.isfile(
+            os.path.join(xml_path, "index.xml")
+        ):
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+
+            if manifest["configuration"] != configuration:
+                manifest = None
+
+        if manifest is None:
+            if os.path.isdir(xml_path):
+                shutil.rmtree(xml_path)
+
+            xml_path = self._generate_full()
+
+            compounds = wurfapi.doxygen_merge.dependencies(
+                xml=wurfapi.doxygen_merge.DoxygenXml(xml_path=xml_path)
+            )
+
+        else:
+            compounds = manifest["compounds"]
+            stale = {p for p, h in files.items() if manifest["files"].get(p) != h}
+            stale |= set(manifest["files"]) - set(files)
+
+            if not stale:
+                return xml_path
+
+            remove_compounds, stale = wurfapi.doxygen_merge.stale_compounds(
+                compounds=compounds, files=stale
+            )
+
+            rerun = sorted(p for p in stale if p in files)
+
+            partial_path = os.path.join(self.output_path, "partial")
+
+            if os.path.isdir(partial_path):
+                shutil.rmtree(partial_path)
+            os.makedirs(partial_path)
+
+            if rerun:
+                partial_xml = self._run(
+                    source_paths=rerun, recursive=False, output_path=partial_path
+                )
+            else:
+                partial_xml = os.path.join(partial_path, "xml")
+
+            merged = wurfapi.doxygen_merge.merge(
+                into=wurfapi.doxygen_merge.DoxygenXml(xml_path=xml_path),
+                other=wurfapi.doxygen_merge.DoxygenXml(xml_path=partial_xml),
+                remove_compounds=remove_compounds,
+                remove_files=stale,
+            )
+
+            for refid in remove_compounds:
+                del compounds[refid]
+
+            compounds.update(
+                wurfapi.doxygen_merge.dependencies(
+                    xml=wurfapi.doxygen_merge.DoxygenXml(xml_path=xml_path),
+                    refids=merged,
+                )
+            )
+
+        with open(manifest_path, "w") as f:
+            json.dump(
+                {
+                    "configuration": configuration,
+                    "files": files,
+                    "compounds": compounds,
+                },
+                f,
+            )
+
+        return xml_path
 
     def _suppress_incorrect_warnings(self, stderr):
 
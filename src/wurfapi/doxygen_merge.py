@@ -0,0 +1,712 @@
+import os
+import re
+import shutil
+import lxml.etree
+
+# Compounds which Doxygen builds from many input files e.g. a namespace
+# opened in several headers. These are tracked member by member. All other
+# compounds are owned by the files found in their location elements and are
+# regenerated as a whole.
+SHARED_KINDS = ["namespace"]
+
+# Compounds where Doxygen derives the refid from the file name. Two runs
+# over different files may therefore use the same refid for two different
+# compounds.
+FILE_KINDS = ["file", "dir"]
+
+# Elements in a compounddef that refer to other compounds
+INNER_TAGS = ["innerdir", "innerfile", "innerclass", "innernamespace"]
+
+# Compounds Doxygen links the words in the documentation to
+LINKED_KINDS = ["class", "struct", "union", "interface", "namespace"]
+
+# Elements containing the documentation of a compound or member
+DESCRIPTION_TAGS = ["briefdescription", "detaileddescription", "inbodydescription"]
+
+# Elements in the documentation where Doxygen does not link words
+UNLINKED_TAGS = ["ref", "ulink", "programlisting", "verbatim", "formula"]
+
+# Words in the documentation Doxygen may turn into links e.g. "Machine",
+# "coffee::machine" or "brew()"
+WORD_PATTERN = re.compile(
+    r"(?<![\w:~.#])(::)?([A-Za-z_]\w*(?:::~?[A-Za-z_]\w*)*)(\(\))?"
+)
+
+# Finds the refid attributes without parsing the XML
+REFID_PATTERN = re.compile(r'refid="([^"]+)"')
+
+
+def normalize_path(path):
+    """Normalize a path such that the paths reported by Doxygen and the
+    paths we pass to Doxygen can be compared.
+    """
+    return os.path.normcase(os.path.realpath(path))
+
+
+def location_files(xml):
+    """Find the source files referenced in the location elements of an XML
+    element and its children.
+
+    :param xml: An XML element e.g. a compounddef or memberdef
+    :return: Set of normalized file paths
+    """
+    files = set()
+
+    for location in xml.iter("location"):
+        for attribute in ["file", "bodyfile"]:
+            if attribute in location.attrib:
+                files.add(normalize_path(location.attrib[attribute]))
+
+    return files
+
+
+def unwrap(element):
+    """Remove an element but keep its text in the parent."""
+
+    text = (element.text or "") + (element.tail or "")
+
+    parent = element.getparent()
+    previous = element.getprevious()
+
+    if previous is not None:
+        previous.tail = (previous.tail or "") + text
+    else:
+        parent.text = (parent.text or "") + text
+
+    parent.remove(element)
+
+
+class DoxygenXml(object):
+    def __init__(self, xml_path):
+        """A Doxygen XML output directory.
+
+        :param xml_path: The directory containing the index.xml file. If
+            the index.xml does not exist we start with an empty index.
+        """
+        self.xml_path = xml_path
+
+        index_path = os.path.join(self.xml_path, "index.xml")
+
+        if os.path.isfile(index_path):
+            self.index = lxml.etree.parse(source=index_path)
+        else:
+            self.index = lxml.etree.ElementTree(lxml.etree.Element("doxygenindex"))
+
+    def compounds(self):
+        """:return: Dict mapping refid to the compound element in the index"""
+        return {c.attrib["refid"]: c for c in self.index.getroot().findall("compound")}
+
+    def path(self, refid):
+        return os.path.join(self.xml_path, refid + ".xml")
+
+    def load(self, refid):
+        return lxml.etree.parse(source=self.path(refid))
+
+    def save(self, refid, tree):
+        tree.write(self.path(refid), encoding="UTF-8", xml_declaration=True)
+
+    def write_index(self):
+        if not os.path.isdir(self.xml_path):
+            os.makedirs(self.xml_path)
+
+        self.index.write(
+            os.path.join(self.xml_path, "index.xml"),
+            encoding="UTF-8",
+            xml_declaration=True,
+        )
+
+
+def dependencies(xml, refids=None):
+    """Find the source files each compound was generated from.
+
+    Shared compounds are merged member by member, so for these we list the
+    files of each member instead.
+
+    :param xml: A DoxygenXml object
+    :param refids: The compounds to look at, if None all compounds are used
+    :return: Dict mapping compound or member refid to a sorted list of files
+    """
+    result = {}
+
+    for refid, compound in xml.compounds().items():
+        if refids is not None and refid not in refids:
+            continue
+
+        compounddefs = xml.load(refid).findall("compounddef")
+
+        if compound.attrib["kind"] in SHARED_KINDS:
+            for compounddef in compounddefs:
+                for memberdef in compounddef.iter("memberdef"):
+                    files = location_files(memberdef)
+                    result[memberdef.attrib["id"]] = sorted(files)
+            continue
+
+        files = set()
+        for compounddef in compounddefs:
+            files |= location_files(compounddef)
+
+        result[refid] = sorted(files)
+
+    return result
+
+
+def stale_compounds(compounds, files):
+    """Find the compounds and namespace members generated from changed
+    source files.
+
+    Regenerating these requires all the files they were generated from,
+    which may be part of even more compounds.
+
+    :param compounds: Dict returned by dependencies(...)
+    :param files: The normalized paths of the changed source files
+    :return: Tuple with the set of compound or member refids to remove and
+        the set of files Doxygen has to run on, including the changed files
+    """
+    remove = set()
+    files = set(files)
+
+    while True:
+        found = {
+            refid
+            for refid, dependencies in compounds.items()
+            if refid not in remove and files.intersection(dependencies)
+        }
+
+        if not found:
+            break
+
+        remove |= found
+        for refid in found:
+            files.update(compounds[refid])
+
+    return remove, files
+
+
+def _compound_location(xml, refid):
+    compounddef = xml.load(refid).find("compounddef")
+    location = compounddef.find("location") if compounddef is not None else None
+
+    if location is None or "file" not in location.attrib:
+        return None
+
+    return normalize_path(location.attrib["file"])
+
+
+def _rename(xml, renames):
+    """Rename compounds in a DoxygenXml.
+
+    Doxygen uses the compound refid as prefix for the ids of the members,
+    so these are renamed as well.
+    """
+
+    def _renamed(value):
+        for old, new in renames.items():
+            if value == old:
+                return new
+            if value.startswith(old + "_1"):
+                return new + value[len(old) :]
+        return value
+
+    def _rename_element(root):
+        for element in root.iter():
+            for attribute in ["id", "refid"]:
+                if attribute in element.attrib:
+                    element.attrib[attribute] = _renamed(element.attrib[attribute])
+
+    for refid in list(xml.compounds()):
+        tree = xml.load(refid)
+        _rename_element(tree.getroot())
+        os.remove(xml.path(refid))
+        xml.save(_renamed(refid), tree)
+
+    _rename_element(xml.index.getroot())
+
+
+def _insert_inner(compounddef, element):
+    """Insert an inner element e.g. innerclass in the compounddef after the
+    existing inner elements."""
+    anchor = None
+
+    for child in compounddef:
+        if child.tag == "compoundname" or child.tag in INNER_TAGS:
+            anchor = child
+
+    if anchor is None:
+        compounddef.insert(0, element)
+    else:
+        anchor.addnext(element)
+
+
+def _insert_sectiondef(compounddef, sectiondef):
+    """Insert a sectiondef element after the existing sectiondefs"""
+    anchor = compounddef.find("briefdescription")
+
+    if anchor is None:
+        compounddef.append(sectiondef)
+    else:
+        anchor.addprevious(sectiondef)
+
+
+def _merge_compound(into_compounddef, other_compounddef):
+    """Merge the members of a compound found in two outputs"""
+
+    # Inner compounds
+    present = {
+        e.attrib["refid"] for tag in INNER_TAGS for e in into_compounddef.findall(tag)
+    }
+
+    for tag in INNER_TAGS:
+        for element in other_compounddef.findall(tag):
+            if element.attrib["refid"] not in present:
+                _insert_inner(into_compounddef, element)
+
+    # Members grouped by the sectiondef kind
+    present = {m.attrib["id"] for m in into_compounddef.iter("memberdef")}
+
+    for other_sectiondef in other_compounddef.findall("sectiondef"):
+        kind = other_sectiondef.attrib["kind"]
+
+        sectiondef = into_compounddef.find("sectiondef[@kind='{}']".format(kind))
+
+        if sectiondef is None:
+            sectiondef = lxml.etree.Element("sectiondef", kind=kind)
+            _insert_sectiondef(into_compounddef, sectiondef)
+
+        for memberdef in other_sectiondef.findall("memberdef"):
+            if memberdef.attrib["id"] in present:
+                continue
+
+            present.add(memberdef.attrib["id"])
+            sectiondef.append(memberdef)
+
+    # The compound may be documented in any of the files
+    for tag in ["briefdescription", "detaileddescription"]:
+        into_description = into_compounddef.find(tag)
+        other_description = other_compounddef.find(tag)
+
+        if other_description is None or not len(other_description):
+            continue
+
+        if into_description is None:
+            _insert_sectiondef(into_compounddef, other_description)
+
+        elif not len(into_description):
+            into_description.getparent().replace(into_description, other_description)
+
+
+def _strip_members(compounddef, files, refids):
+    """Remove the members generated from the files and the inner compounds
+    with the given refids.
+
+    :return: The set of removed ids, empty if nothing was removed
+    """
+    removed = set()
+
+    for sectiondef in compounddef.findall("sectiondef"):
+        for memberdef in sectiondef.findall("memberdef"):
+            if location_files(memberdef) & files:
+                removed.add(memberdef.attrib["id"])
+                sectiondef.remove(memberdef)
+
+        if not len(sectiondef.findall("memberdef")):
+            compounddef.remove(sectiondef)
+
+    for tag in INNER_TAGS:
+        for element in compounddef.findall(tag):
+            if element.attrib["refid"] in refids:
+                removed.add(element.attrib["refid"])
+                compounddef.remove(element)
+
+    return removed
+
+
+def _is_empty(compounddef):
+    return compounddef.find("sectiondef") is None and not any(
+        compounddef.find(tag) is not None for tag in INNER_TAGS
+    )
+
+
+def merge(into, other, remove_compounds=(), remove_files=()):
+    """Merge the Doxygen XML in other into an existing output.
+
+    :param into: The DoxygenXml to merge into, this is updated on disk.
+    :param other: The DoxygenXml to merge from.
+    :param remove_compounds: The refids of compounds in into which should be
+        removed before merging.
+    :param remove_files: Members of shared compounds generated from these
+        files are removed before merging.
+    :return: List of compound refids copied or merged from other (after any
+        renaming)
+    """
+    remove_files = {normalize_path(f) for f in remove_files}
+
+    into_compounds = into.compounds()
+    index_root = into.index.getroot()
+
+    # The ids that have been removed and could be referenced elsewhere
+    removed_ids = set()
+
+    # 1. Remove the stale compounds
+    for refid in remove_compounds:
+        if refid not in into_compounds:
+            continue
+
+        compound = into_compounds.pop(refid)
+        removed_ids.add(refid)
+        removed_ids |= {m.attrib["refid"] for m in compound.findall("member")}
+
+        index_root.remove(compound)
+
+        if os.path.isfile(into.path(refid)):
+            os.remove(into.path(refid))
+
+    # 2. Strip the stale members from the shared compounds
+    stripped = set()
+
+    for refid, compound in into_compounds.items():
+        if compound.attrib["kind"] not in SHARED_KINDS:
+            continue
+
+        if not remove_files and not removed_ids:
+            break
+
+        tree = into.load(refid)
+        compounddef = tree.find("compounddef")
+
+        removed = _strip_members(compounddef, files=remove_files, refids=removed_ids)
+
+        if not removed:
+            continue
+
+        for member in compound.findall("member"):
+            if member.attrib["refid"] in removed:
+                compound.remove(member)
+
+        removed_ids |= removed
+        stripped.add(refid)
+        into.save(refid, tree)
+
+    # 3. Reconcile the refids of other. Doxygen derives the refids of files
+    #    and directories from the names it has seen in a run, so two
+    #    different files may have the same refid in two different runs.
+    other_compounds = other.compounds()
+    renames = {}
+
+    for refid, compound in other_compounds.items():
+        if compound.attrib["kind"] not in FILE_KINDS or refid not in into_compounds:
+            continue
+
+        if _compound_location(into, refid) == _compound_location(other, refid):
+            continue
+
+        new_refid = refid
+        while new_refid in into_compounds or new_refid in other_compounds:
+            new_refid += "_m"
+
+        renames[refid] = new_refid
+
+    if renames:
+        _rename(other, renames)
+        other_compounds = other.compounds()
+
+    # 4. Copy or merge the compounds of other. A compound found in both is
+    #    merged member by member e.g. a namespace opened in several files
+    #    or a class where the members are defined in another file.
+    for refid, compound in other_compounds.items():
+        if refid in into_compounds:
+            tree = into.load(refid)
+
+            for other_compounddef in other.load(refid).findall("compounddef"):
+                _merge_compound(tree.find("compounddef"), other_compounddef)
+
+            into.save(refid, tree)
+
+            into_compound = into_compounds[refid]
+            present = {m.attrib["refid"] for m in into_compound.findall("member")}
+
+            for member in compound.findall("member"):
+                if member.attrib["refid"] not in present:
+                    into_compound.append(member)
+
+            continue
+
+        if not os.path.isdir(into.xml_path):
+            os.makedirs(into.xml_path)
+
+        shutil.copyfile(other.path(refid), into.path(refid))
+
+        index_root.append(compound)
+        into_compounds[refid] = compound
+
+    # 5. Remove shared compounds which no longer contain anything
+    while True:
+        empty = set()
+
+        for refid in stripped:
+            if refid in other_compounds or refid not in into_compounds:
+                continue
+
+            if _is_empty(into.load(refid).find("compounddef")):
+                empty.add(refid)
+
+        if not empty:
+            break
+
+        for refid in empty:
+            index_root.remove(into_compounds.pop(refid))
+            os.remove(into.path(refid))
+            removed_ids.add(refid)
+
+        # Parent namespaces may now be empty as well
+        for refid, compound in into_compounds.items():
+            if compound.attrib["kind"] not in SHARED_KINDS:
+                continue
+
+            tree = into.load(refid)
+            compounddef = tree.find("compounddef")
+
+            if not _strip_members(compounddef, files=set(), refids=empty):
+                continue
+
+            into.save(refid, tree)
+            stripped.add(refid)
+
+    # 6. Remove references to ids which no longer exist
+    present_ids = set(into_compounds)
+    for compound in into_compounds.values():
+        present_ids |= {m.attrib["refid"] for m in compound.findall("member")}
+
+    dangling = removed_ids - present_ids
+
+    if dangling:
+        remove_dangling_refs(xml=into, refids=dangling)
+
+    into.write_index()
+
+    return list(other_compounds)
+
+
+def remove_dangling_refs(xml, refids):
+    """Remove references to compounds or members that do not exist.
+
+    Text references are replaced with their plain text, such that the
+    LinkMapper can try to resolve them again later.
+
+    :param xml: The DoxygenXml object
+    :param refids: The set of refids that no longer exist
+    """
+    encoded = [refid.encode("utf-8") for refid in refids]
+
+    for refid in xml.compounds():
+        with open(xml.path(refid), "rb") as f:
+            content = f.read()
+
+        # Avoid parsing files which cannot contain any of the refids
+        if not any(e in content for e in encoded):
+            continue
+
+        tree = xml.load(refid)
+        changed = False
+
+        for element in list(tree.iter("ref")):
+            if element.attrib.get("refid") in refids:
+                unwrap(element)
+                changed = True
+
+        for tag in INNER_TAGS:
+            for element in list(tree.iter(tag)):
+                if element.attrib.get("refid") in refids:
+                    element.getparent().remove(element)
+                    changed = True
+
+        if changed:
+            xml.save(refid, tree)
+
+
+def reconcile(xml):
+    """Remove references to refids not found in the XML.
+
+    When Doxygen runs on a subset of the files, each run only knows its own
+    compounds and members. After merging the runs we make sure that all
+    references point to something in the merged output.
+
+    :param xml: The DoxygenXml object
+    :return: The set of refids which were removed
+    """
+    compounds = xml.compounds()
+
+    present = set(compounds)
+    for compound in compounds.values():
+        present |= {m.attrib["refid"] for m in compound.findall("member")}
+
+    referenced = set()
+
+    for refid in compounds:
+        with open(xml.path(refid), "rb") as f:
+            content = f.read().decode("utf-8")
+
+        referenced |= set(REFID_PATTERN.findall(content))
+
+    dangling = referenced - present
+
+    if dangling:
+        remove_dangling_refs(xml=xml, refids=dangling)
+
+    return dangling
+
+
+def link_names(xml):
+    """Find the names Doxygen links to in the documentation.
+
+    :param xml: A DoxygenXml object
+    :return: Dict mapping a qualified name e.g. "coffee::machine::brew" to
+        a (refid, kindref) tuple
+    """
+    result = {}
+
+    for refid, compound in xml.compounds().items():
+        kind = compound.attrib["kind"]
+
+        if kind in LINKED_KINDS:
+            scope = compound.findtext("name")
+            result.setdefault(scope, (refid, "compound"))
+
+        elif kind in FILE_KINDS:
+            # The global members, the index also lists the namespace members
+            # under the file
+            scope = None
+
+        else:
+            continue
+
+        for member in compound.findall("member"):
+            member_refid = member.attrib["refid"]
+
+            if scope is not None:
+                name = scope + "::" + member.findtext("name")
+            elif member_refid.startswith(refid + "_1"):
+                name = member.findtext("name")
+            else:
+                continue
+
+            result.setdefault(name, (member_refid, "member"))
+
+    return result
+
+
+def relink(xml, names):
+    """Link the words in the documentation naming something Doxygen did
+    not see.
+
+    When Doxygen runs on a subset of the files, a word naming a compound or
+    member from the other files is left as plain text. We turn these into
+    references following Doxygen's autolink rules: a word is linked if it
+    contains "::", is followed by "()" or is not all lower case. Relative
+    names are looked up in the enclosing scopes, innermost first.
+
+    Words naming something the run did see are left alone, Doxygen already
+    decided not to link these (e.g. "%Machine").
+
+    :param xml: The DoxygenXml of a run on a subset of the files
+    :param names: Dict returned by link_names(...) for the output of all
+        the runs
+    :return: The number of references added
+    """
+    known = link_names(xml)
+    count = 0
+
+    def resolve(match, scope):
+        lead, word, call = match.groups()
+
+        lower = all(c.islower() for c in word)
+
+        if not (lead or call or "::" in word or not lower):
+            return None
+
+        if lead:
+            candidates = [word]
+        else:
+            parts = scope.split("::") if scope else []
+            candidates = [
+                "::".join(parts[:i] + [word]) for i in range(len(parts), -1, -1)
+            ]
+
+        for candidate in candidates:
+            if candidate in names:
+                return None if candidate in known else names[candidate]
+
+        return None
+
+    def relink_text(parent, previous, scope):
+        # The text before the first child or the tail of a child
+        text = parent.text if previous is None else previous.tail
+
+        if not text:
+            return 0
+
+        refs = []
+        start = 0
+
+        for match in WORD_PATTERN.finditer(text):
+            target = resolve(match, scope)
+
+            if target is None:
+                continue
+
+            refid, kindref = target
+            ref = lxml.etree.Element("ref", refid=refid, kindref=kindref)
+            ref.text = match.group(0)
+            refs.append((text[start : match.start()], ref))
+            start = match.end()
+
+        if not refs:
+            return 0
+
+        refs[-1][1].tail = text[start:]
+
+        for index, (before, ref) in enumerate(refs):
+            if index > 0:
+                refs[index - 1][1].tail = before
+            elif previous is None:
+                parent.text = before
+            else:
+                previous.tail = before
+
+            if previous is None:
+                parent.insert(index, ref)
+            else:
+                previous.addnext(ref)
+                previous = ref
+
+        return len(refs)
+
+    def relink_element(element, scope):
+        if element.tag in UNLINKED_TAGS:
+            return 0
+
+        added = relink_text(element, None, scope)
+
+        for child in list(element):
+            added += relink_element(child, scope)
+            added += relink_text(element, child, scope)
+
+        return added
+
+    for refid, compound in xml.compounds().items():
+        if compound.attrib["kind"] in LINKED_KINDS:
+            scope = compound.findtext("name")
+        else:
+            scope = ""
+
+        tree = xml.load(refid)
+        added = 0
+
+        for tag in DESCRIPTION_TAGS:
+            for description in list(tree.iter(tag)):
+                added += relink_element(description, scope)
+
+        if added:
+            xml.save(refid, tree)
+            count += added
+
+    return count
@@ -6,7 +6,12 @@ import inspect
 import contextlib
 import copy
 import re
+import sys
+import hashlib
+import logging
+import concurrent.futures
 
+from . import compat
 from .compat import IS_PY2
 
 
@@ -60,12 +65,30 @@ def replace_with(replace, data):
     return _replace(data)
 
 
+# The arguments a parser function can ask for. Except for "xml" and
+# "parser" these are attributes of the DoxygenParser with the same name.
+INJECTABLE_ARGUMENTS = ["xml", "parser", "log", "location_mapper", "scope"]
+
+
 class ParserFunction(object):
     def __init__(self, function, tag, attrib):
         self.function = function
         self.tag = tag
         self.attrib = attrib if attrib else {}
 
+        # Find the arguments to inject once, rather than on every call
+        if IS_PY2:
+            require_arguments = inspect.getargspec(function)[0]
+
+        else:
+            require_arguments = inspect.getfullargspec(function)[0]
+
+        for argument in require_arguments:
+            if argument not in INJECTABLE_ARGUMENTS:
+                raise RuntimeError("Not injectable arg {}".format(argument))
+
+        self.arguments = [a for a in require_arguments if a != "xml"]
+
     @property
     def score(self):
         """The score is how "specilized" the parser function is.
@@ -95,7 +118,16 @@ class DoxygenParser(object):
     # Default parsers
     default_parsers = []
 
-    def __init__(self, doxygen_path, location_mapper, patch_api, log):
+    def __init__(
+        self,
+        doxygen_path,
+        location_mapper,
+        patch_api,
+        log,
+        workers=1,
+        cache=None,
+        streaming=False,
+    ):
         """Create a new DoxygenParser
 
         :param doxygen_path: The path to where the Doxygen XML is
@@ -105,15 +137,30 @@ class DoxygenParser(object):
         :param patch_api: Set of patches to apply to the API after parsing the
             Doxygen XML.
         :param log: Log object
+        :param workers: The number of worker processes used to parse the
+            compounds. If 1 the compounds are parsed in this process.
+        :param cache: ParserCache object used to store the parsed compounds
+            between builds. If None every compound is parsed.
+        :param streaming: If True the compound XML files are read using
+            iterparse and each memberdef is parsed and cleared as soon as
+            it has been read. This bounds the memory used by the XML tree
+            when parsing large compounds.
         """
         self.doxygen_path = doxygen_path
         self.location_mapper = location_mapper
         self.patch_api = patch_api
         self.log = log
+        self.workers = workers
+        self.cache = cache
+        self.streaming = streaming
 
         # The parser functions registered
         self.parsers = DoxygenParser.default_parsers
 
+        # Index of the parser functions keyed on (tag, kind), see
+        # _find_parser(...)
+        self.dispatch, self.scan_tags = self._compile_dispatch(self.parsers)
+
         # Scope variable used to track the C++ scope of member
         # functions etc.
         self.scope = None
@@ -124,6 +171,88 @@ class DoxygenParser(object):
         # mapping with the following dict
         self.id_mapping = {}
 
+        # The places in the API where a Doxygen id is stored. Each item is
+        # a (container, key, refid) tuple, see add_reference(...)
+        self.references = []
+
+        # The memberdef elements parsed while streaming, see preparse(...)
+        self.preparsed = {}
+
+    def add_reference(self, container, key):
+        """Record that container[key] holds a Doxygen id.
+
+        Once all compounds are parsed the id is replaced with the
+        unique-name found in the id_mapping.
+
+        :param container: The dict or list holding the id
+        :param key: The key or index of the id in the container
+        """
+        self.references.append((container, key, container[key]))
+
+    def _resolve_references(self):
+        """Replace the recorded Doxygen ids with their unique-name.
+
+        Ids without a mapping e.g. to entities Doxygen did not output are
+        left unchanged.
+        """
+        for container, key, refid in self.references:
+            if refid in self.id_mapping:
+                container[key] = self.id_mapping[refid]
+
+    def preparse(self, xml, scope):
+        """Parse an element before its parent is parsed.
+
+        Used when streaming, where the element's children are cleared
+        once it has been parsed. The result and the id mapping and
+        references it adds are stored until the parent's parser function
+        asks for the element, such that the API is the same as when
+        parsing the full tree.
+
+        :param xml: The XML element, typically a memberdef
+        :param scope: The scope the element will be parsed in
+        """
+        id_mapping, references = self.id_mapping, self.references
+        self.id_mapping, self.references = {}, []
+
+        result, error = None, None
+
+        try:
+            self.scope = scope
+            result = self.parse_element(xml=xml)
+        except Exception as e:
+            # Raised if the element is used, the parser functions do not
+            # parse every memberdef
+            error = e
+        finally:
+            self.preparsed[xml] = (
+                scope,
+                result,
+                self.id_mapping,
+                self.references,
+                error,
+            )
+
+            self.scope = None
+            self.id_mapping, self.references = id_mapping, references
+
+    def _use_preparsed(self, xml):
+        scope, result, id_mapping, references, error = self.preparsed[xml]
+
+        if scope != self.scope:
+            raise RuntimeError(
+                "Element {} preparsed with scope {} but used in scope {}".format(
+                    xml.attrib, scope, self.scope
+                )
+            )
+
+        if error is not None:
+            raise error
+
+        self.id_mapping.update(id_mapping)
+        self.references += references
+
+        return result
+
     @contextlib.contextmanager
     def set_scope(self, scope):
         assert self.scope is None
@@ -145,15 +274,64 @@ class DoxygenParser(object):
 
         index_xml = lxml.etree.parse(source=index_path)
 
-        api = {}
+        compounds = index_xml.findall("compound")
+
+        # Each compound is parsed into a fragment, which is a tuple with
+        # the API, id mapping and references found in the compound
+        fragments = [None] * len(compounds)
+        keys = [None] * len(compounds)
 
-        # Iterate thought the "compound" elements of the Doxygen index.xml
-        for compound in index_xml.findall("compound"):
-            compound_api = self.parse_element(xml=compound)
+        if self.cache is not None:
+            configuration = self._cache_configuration()
 
+            for index, compound in enumerate(compounds):
+                keys[index] = self.cache.key(
+                    xml_path=self._compound_path(compound=compound),
+                    configuration=configuration,
+                )
+                fragments[index] = self.cache.lookup(key=keys[index])
+
+        missing = [i for i, fragment in enumerate(fragments) if fragment is None]
+
+        if self.workers > 1 and len(missing) > 1:
+            parsed = self._parse_compounds_parallel(
+                compounds=[compounds[i] for i in missing]
+            )
+        else:
+            parsed = [self._parse_compound(compound=compounds[i]) for i in missing]
+
+        for index, fragment in zip(missing, parsed):
+            fragments[index] = fragment
+
+            if self.cache is not None:
+                self.cache.store(key=keys[index], fragment=fragment)
+
+        if self.cache is not None:
+            self.log.debug(
+                "Parser cache %d hits %d misses",
+                len(compounds) - len(missing),
+                len(missing),
+            )
+            self.cache.prune(keys=keys)
+
+        # Merge the fragments in the order of the index.xml
+        api = {}
+        entries = 0
+
+        for compound_api, id_mapping, references in fragments:
+            entries += len(compound_api)
             api.update(compound_api)
+            self.id_mapping.update(id_mapping)
+            self.references += references
+
+        # Entries found in several compounds are parsed once per compound
+        self.log.debug(
+            "Parsed %d API entries, %d found in several compounds",
+            entries,
+            entries - len(api),
+        )
 
-        api = replace_with(replace=self.id_mapping, data=api)
+        self._resolve_references()
 
         def apply_patch(selector, key, value):
             api[selector][key] = value
@@ -163,44 +341,188 @@ class DoxygenParser(object):
 
         return api
 
+    def _compound_path(self, compound):
+        return os.path.join(self.doxygen_path, compound.attrib["refid"] + ".xml")
+
+    def _cache_configuration(self):
+        """The inputs other than the compound XML which affect the result.
+
+        :return: The configuration as a string
+        """
+        # The code producing the fragments: this module, the helpers it
+        # uses and the location mapper resolving the paths
+        modules = [
+            sys.modules[__name__],
+            compat,
+            inspect.getmodule(type(self.location_mapper)),
+            inspect.getmodule(type(self.cache)),
+        ]
+
+        sha1 = hashlib.sha1()
+
+        for module in modules:
+            path = getattr(module, "__file__", None)
+
+            if path is None or not os.path.isfile(path):
+                continue
+
+            with open(path, "rb") as f:
+                sha1.update(f.read())
+
+        return "\0".join(
+            [sha1.hexdigest(), str(self.location_mapper.project_root)]
+            + [str(p) for p in self.location_mapper.include_paths]
+        )
+
+    def _parse_compound(self, compound):
+        """Parse a "compound" element of the Doxygen index.xml
+
+        :return: The fragment tuple (api, id_mapping, references)
+        """
+        id_mapping, references = self.id_mapping, self.references
+        self.id_mapping, self.references = {}, []
+
+        try:
+            api = self.parse_element(xml=compound)
+            return api, self.id_mapping, self.references
+        finally:
+            self.id_mapping, self.references = id_mapping, references
+
+    def _parse_compounds_parallel(self, compounds):
+        """Parse the "compound" elements using a pool of worker processes.
+
+        The compounds are split into consecutive chunks, each worker
+        returns the fragments for its chunk.
+
+        :return: List of fragments in the same order as the compounds
+        """
+
+        # A few chunks per worker evens out the differences in compound sizes
+        chunk_count = min(len(compounds), self.workers * 4)
+        chunk_size = -(-len(compounds) // chunk_count)
+
+        chunks = [
+            [
+                lxml.etree.tostring(compound)
+                for compound in compounds[i : i + chunk_size]
+            ]
+            for i in range(0, len(compounds), chunk_size)
+        ]
+
+        # The log object may not be picklable so the workers use their own
+        location_mapper = copy.copy(self.location_mapper)
+        location_mapper.log = None
+
+        fragments = []
+
+        with concurrent.futures.ProcessPoolExecutor(self.workers) as executor:
+            results = executor.map(
+                _parse_compounds_worker,
+                [self.doxygen_path] * len(chunks),
+                [location_mapper] * len(chunks),
+                [self.streaming] * len(chunks),
+                chunks,
+            )
+
+            for chunk_fragments in results:
+                fragments += chunk_fragments
+
+        return fragments
+
     def parse_element(self, xml):
         """Parse an XML element"""
 
-        parser = self._find_in_list(xml=xml)
+        if self.preparsed and xml in self.preparsed:
+            return self._use_preparsed(xml=xml)
+
+        parser = self._find_parser(xml=xml)
 
         # Inject needed arguments
         args = {"xml": xml}
 
-        if IS_PY2:
-            require_arguments = inspect.getargspec(parser.function)[0]
-
-        else:
-            require_arguments = inspect.getfullargspec(parser.function)[0]
-
-        for argument in require_arguments:
+        for argument in parser.arguments:
             if argument == "parser":
                 args["parser"] = self
-            elif argument == "log":
-                args["log"] = self.log
-            elif argument == "location_mapper":
-                args["location_mapper"] = self.location_mapper
-            elif argument == "scope":
-                args["scope"] = self.scope
-            elif argument == "xml":
-                continue
             else:
-                raise RuntimeError("Not injectable arg {}".format(argument))
+                args[argument] = getattr(self, argument)
 
         return parser.function(**args)
 
     def supports(self, xml):
         try:
-            self._find_in_list(tag=xml.tag, attrib=xml.attrib)
+            self._find_parser(xml=xml)
         except RuntimeError:
             return False
         else:
             return True
 
+    @staticmethod
+    def _compile_dispatch(parsers):
+        """Build the index used to find the parser function for an element.
+
+        Parser functions registered without attributes are stored under
+        (tag, None) and functions registered for a specific kind under
+        (tag, kind). Functions matching on other attributes cannot be
+        indexed, their tags are returned such that elements with these
+        tags are matched using _find_in_list(...).
+
+        :param parsers: List of ParserFunction objects
+        :return: Tuple with the index dict and the set of tags to scan
+        """
+        dispatch = {}
+        scan_tags = set()
+
+        for parser in parsers:
+            if not parser.attrib:
+                key = (parser.tag, None)
+            elif list(parser.attrib) == ["kind"]:
+                key = (parser.tag, parser.attrib["kind"])
+            else:
+                scan_tags.add(parser.tag)
+                continue
+
+            # Same as in _find_in_list(...) two parsers for the same element
+            # is an error, rather than one silently replacing the other
+            if key in dispatch:
+                raise RuntimeError(
+                    "Two ambigious parsers for tag {} attrib {}".format(
+                        parser.tag, parser.attrib
+                    )
+                )
+
+            dispatch[key] = parser
+
+        return dispatch, scan_tags
+
+    def _find_parser(self, xml):
+        """Find the parser function for a specific XML element.
+
+        A parser registered for the element's kind is preferred over a
+        parser registered for the tag only, as in _find_in_list(...).
+
+        :param xml: The XML element
+        :return: A ParserFunction object
+        """
+        if xml.tag in self.scan_tags:
+            return self._find_in_list(xml=xml)
+
+        kind = xml.get("kind")
+
+        if kind is not None:
+            try:
+                return self.dispatch[(xml.tag, kind)]
+            except KeyError:
+                pass
+
+        try:
+            return self.dispatch[(xml.tag, None)]
+        except KeyError:
+            raise RuntimeError(
+                "No parser for tag {} attrib {}\nCandidates are: {}".format(
+                    xml.tag, xml.attrib, self.parsers
+                )
+            )
+
     def _find_in_list(self, xml):
         """Find the parser function for a specific XML element.
 
@@ -259,6 +581,35 @@ class DoxygenParser(object):
         return _register
 
 
+def _parse_compounds_worker(doxygen_path, location_mapper, streaming, compounds):
+    """Parse a chunk of compounds in a worker process.
+
+    :param doxygen_path: The path to where the Doxygen XML is located.
+    :param location_mapper: The LocationMapper without a log object
+    :param streaming: Whether to stream the compound XML files
+    :param compounds: List of serialized "compound" elements
+    :return: List of fragment tuples (api, id_mapping, references). These
+        are returned together such that the references still point into
+        the API after unpickling.
+    """
+    log = logging.getLogger(__name__)
+
+    location_mapper.log = log
+
+    parser = DoxygenParser(
+        doxygen_path=doxygen_path,
+        location_mapper=location_mapper,
+        patch_api=[],
+        log=log,
+        streaming=streaming,
+    )
+
+    return [
+        parser._parse_compound(compound=lxml.etree.fromstring(compound))
+        for compound in compounds
+    ]
+
+
 @DoxygenParser.register(tag="compound")
 def parse(parser, log, xml):
     """Parses Doxygen CompoundType
@@ -271,19 +622,73 @@ def parse(parser, log, xml):
     compound_filename = xml.attrib["refid"] + ".xml"
     compound_path = os.path.join(parser.doxygen_path, compound_filename)
 
-    compound_xml = lxml.etree.parse(source=compound_path)
+    if parser.streaming:
+        compound_xml = iterparse_compound(parser=parser, compound_path=compound_path)
+    else:
+        compound_xml = lxml.etree.parse(source=compound_path)
 
     api = {}
 
     # There can be multiple "compunddef" tags in each XML file
     # according to Doxygen's generated compound.xsd file
-    for compounddef in compound_xml.findall("compounddef"):
-        compunddef_api = parser.parse_element(xml=compounddef)
-        api.update(compunddef_api)
+    try:
+        for compounddef in compound_xml.findall("compounddef"):
+            compunddef_api = parser.parse_element(xml=compounddef)
+            api.update(compunddef_api)
+    finally:
+        parser.preparsed.clear()
 
     return api
 
 
+def compound_scope(xml):
+    """The scope used by the compounddef parser functions for the members
+
+    :param xml: A doxygen compounddef element
+    :return: The scope as a string or None
+    """
+    kind = xml.attrib.get("kind")
+
+    if kind == "namespace":
+        return xml.findtext("compoundname")
+
+    if kind in ["class", "struct"]:
+        # Remove all whitespace as done for the unique-name of the class
+        return xml.findtext("compoundname").replace(" ", "")
+
+    return None
+
+
+def iterparse_compound(parser, compound_path):
+    """Read a compound XML file parsing each memberdef as soon as it is read.
+
+    The children of the memberdef are removed once it has been parsed, so
+    only the currently read memberdef is kept in memory as a full tree.
+
+    :param compound_path: The path to the compound XML file
+    :return: The XML tree where the memberdef elements are placeholders
+    """
+    context = lxml.etree.iterparse(compound_path, events=("end",), tag="memberdef")
+
+    compounddef, scope = None, None
+
+    for _, memberdef in context:
+        parent = next(memberdef.iterancestors("compounddef"), None)
+
+        if parent is not compounddef:
+            compounddef = parent
+            scope = None if parent is None else compound_scope(xml=parent)
+
+        parser.preparse(xml=memberdef, scope=scope)
+
+        # Keep the attributes, they are used to find the parser function
+        attrib = dict(memberdef.attrib)
+        memberdef.clear(keep_tail=True)
+        memberdef.attrib.update(attrib)
+
+    return lxml.etree.ElementTree(context.root)
+
+
 @DoxygenParser.register(tag="sectiondef", attrib={"kind": "enum"})
 @DoxygenParser.register(tag="sectiondef", attrib={"kind": "func"})
 @DoxygenParser.register(tag="sectiondef", attrib={"kind": "define"})
@@ -375,13 +780,17 @@ def parse(parser, xml):
     #   https://github.com/doxygen/doxygen/issues/6741
     result["inline"] = False
 
+    refids = set()
+
     for member in xml.findall(".//innerclass"):
         refid = member.attrib["refid"]
         result["members"].append(refid)
+        refids.add(refid)
 
     for member in xml.findall(".//innernamespace"):
         refid = member.attrib["refid"]
         result["members"].append(refid)
+        refids.add(refid)
 
     # In this tag we find
     #  - free functions in sectiondef tags
@@ -399,6 +808,7 @@ def parse(parser, xml):
     # Sort the members list such that they always appear in
     # the same order
     result["members"].sort()
+    add_member_references(parser=parser, members=result["members"], refids=refids)
 
     api[scoped_name] = result
     return api
@@ -443,9 +853,12 @@ def parse(parser, xml):
         result["template_parameters"] = template_parameters
 
     # Inner classes have their own tag
+    refids = set()
+
     for innerclass in xml.findall(".//innerclass"):
         refid = innerclass.attrib["refid"]
         result["members"].append(refid)
+        refids.add(refid)
 
     api = {}
 
@@ -466,6 +879,7 @@ def parse(parser, xml):
     # Sort the members list such that they always appear in
     # the same order
     result["members"].sort()
+    add_member_references(parser=parser, members=result["members"], refids=refids)
 
     api[unique_name] = result
 
@@ -832,8 +1246,14 @@ def parse(xml, parser, log):
         result.append({"value": p.findtext("argsstring").strip("\r\n")})
 
     for child in xml.getchildren():
-        if match(xml=child, tag="ref"):
+        if match(xml=child, tag="ref") and "external" in child.attrib:
+            # A reference to a type found in a Doxygen tag file, the
+            # link mapper finds the link using the symbols of the tag file
+            append_text(child.text)
+
+        elif match(xml=child, tag="ref"):
             link = {"url": False, "value": child.attrib["refid"]}
+            parser.add_reference(container=link, key="value")
 
             result.append({"value": child.text.strip(), "link": link})
 
@@ -844,6 +1264,17 @@ def parse(xml, parser, log):
     return result
 
 
+def add_member_references(parser, members, refids):
+    """Helper for recording the Doxygen ids in a members list
+
+    :param members: The sorted list of members of a class or namespace
+    :param refids: The Doxygen ids of the inner classes and namespaces
+    """
+    for index, member in enumerate(members):
+        if member in refids:
+            parser.add_reference(container=members, key=index)
+
+
 def parse_template_parameters(xml, parser):
     """Helper for parsing templates of functions, structs and classes
 
@@ -1164,12 +1595,18 @@ def parse(parser, log, xml):
 
 
 @DoxygenParser.register(tag="ref")
-def parse(log, xml):
+def parse(parser, xml):
     """Parses Doxygen ref tag
 
     :return: List of "Text information" paragraphs
     """
+    if "external" in xml.attrib:
+        # The reference is to something found in a Doxygen tag file, which
+        # is not part of the API
+        return [{"kind": "text", "content": xml.text}]
+
     link = {"url": False, "value": xml.attrib["refid"]}
+    parser.add_reference(container=link, key="value")
     return [{"kind": "text", "content": xml.text, "link": link}]
 
 
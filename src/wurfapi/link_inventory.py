@@ -0,0 +1,238 @@
+import re
+import zlib
+import posixpath
+import lxml.etree
+
+from . import wurfapi_error
+
+# The first line of a Sphinx objects.inv file
+SPHINX_HEADER = "# Sphinx inventory version 2"
+
+# Each line in the compressed part of an objects.inv file has the form
+# "name domain:role priority uri dispname"
+SPHINX_LINE = re.compile(r"(.+?)\s+(\S+)\s+(-?\d+)\s+?(\S*)\s+(.*)")
+
+# The roles we use from a Sphinx inventory. Other entries e.g. documents
+# and Python objects would just turn random words into links.
+SPHINX_ROLES = ("cpp:", "c:")
+
+# The role of the Sphinx labels. These are only used if asked for, since
+# Sphinx stores the labels in lower case and a label such as "buffer" would
+# turn a type of the same name into a link to a section of prose.
+SPHINX_LABEL_ROLE = "std:label"
+
+# The kinds of Doxygen tag file compounds we use. Members of e.g. files are
+# not scoped, so their names would turn random words into links.
+TAGFILE_KINDS = ["class", "struct", "union", "namespace"]
+
+# The labels Sphinx adds to every project
+SPHINX_LABELS = ["genindex", "modindex", "py-modindex", "search"]
+
+
+class SymbolIndex(object):
+    def __init__(self):
+        """Index of symbols documented elsewhere e.g. in a sibling library.
+
+        The symbols are stored in a dict, so finding the link for a symbol
+        takes the same time however many symbols are loaded.
+        """
+        self.symbols = {}
+
+        # Sphinx stores the names of labels in lower case, so these are
+        # looked up separately using the lower case type name
+        self.labels = {}
+
+    def __len__(self):
+        return len(self.symbols) + len(self.labels)
+
+    def add(self, name, url, label=False):
+        """Add a symbol to the index.
+
+        If the same symbol is added twice the first url is kept.
+
+        :param name: The C++ name of the symbol e.g. "kodo::block::encoder"
+        :param url: The url to the documentation of the symbol
+        :param label: True if the name is a lower case Sphinx label
+        """
+        if label:
+            self.labels.setdefault(name, url)
+        else:
+            self.symbols.setdefault(name, url)
+
+    def find_link(self, typename):
+        """Find the link for a symbol.
+
+        :param typename: A C++ type name as a string
+        :return: A link dictionary or None
+        """
+        url = self.symbols.get(typename)
+
+        if url is None and self.labels:
+            url = self.labels.get(typename.lower())
+
+        if url is None:
+            return None
+
+        return {"url": True, "value": url}
+
+    def load(self, path, url, labels=False):
+        """Load the symbols from a file.
+
+        The file is either a Sphinx objects.inv file, a Doxygen tag file or
+        a symbol list.
+
+        :param path: The path to the file
+        :param url: The base url which the urls in the file are relative to
+        :param labels: If True the labels in a Sphinx objects.inv file are
+            used as well as the C/C++ objects
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+
+        if data.startswith(SPHINX_HEADER.encode("utf-8")):
+            for name, role, location in read_sphinx_inventory(data=data, labels=labels):
+                self.add(
+                    name=name,
+                    url=join_url(url=url, location=location),
+                    label=role == SPHINX_LABEL_ROLE,
+                )
+            return
+
+        if data.lstrip().startswith(b"<"):
+            symbols = read_doxygen_tagfile(data=data)
+        else:
+            symbols = read_symbol_list(text=data.decode("utf-8"))
+
+        # Many symbols share the same url e.g. the members of a class, so
+        # we only keep one copy of each url
+        urls = {}
+
+        for name, location in symbols:
+            location = join_url(url=url, location=location)
+            self.add(name=name, url=urls.setdefault(location, location))
+
+
+def read_sphinx_inventory(data, labels=False):
+    """Read the symbols in a Sphinx objects.inv file.
+
+    :param data: The content of the file as bytes
+    :param labels: If True the labels are read as well as the C/C++ objects
+    :return: List of (name, role, location) tuples
+    """
+
+    # The file starts with four header lines, the rest is compressed
+    lines = data.split(b"\n", 4)
+
+    if len(lines) < 5 or b"zlib" not in lines[3]:
+        raise wurfapi_error.WurfapiError("Invalid Sphinx inventory")
+
+    roles = SPHINX_ROLES + (SPHINX_LABEL_ROLE,) if labels else SPHINX_ROLES
+
+    symbols = []
+
+    for line in zlib.decompress(lines[4]).decode("utf-8").splitlines():
+        match = SPHINX_LINE.match(line.rstrip())
+
+        if not match:
+            continue
+
+        name, role, _, location, _ = match.groups()
+
+        if not role.startswith(roles) or name in SPHINX_LABELS:
+            continue
+
+        # Sphinx shortens the location if it ends with the name
+        if location.endswith("$"):
+            location = location[:-1] + name
+
+        symbols.append((name, role, location))
+
+    return symbols
+
+
+def read_doxygen_tagfile(data):
+    """Read the symbols in a Doxygen tag file.
+
+    :param data: The content of the file as bytes
+    :return: List of (name, location) tuples
+    """
+
+    symbols = []
+
+    for compound in lxml.etree.fromstring(data).iterfind("compound"):
+        if compound.attrib.get("kind") not in TAGFILE_KINDS:
+            continue
+
+        name = compound.findtext("name")
+        symbols.append((name, tagfile_html(compound.findtext("filename"))))
+
+        for member in compound.iterfind("member"):
+            location = tagfile_html(member.findtext("anchorfile"))
+
+            if member.findtext("anchor"):
+                location += "#" + member.findtext("anchor")
+
+            symbols.append((name + "::" + member.findtext("name"), location))
+
+    return symbols
+
+
+def tagfile_html(filename):
+    """Newer Doxygen versions leave out the extension of the HTML files
+    in the tag file.
+
+    :param filename: The filename from the tag file
+    :return: The filename with the extension
+    """
+    if not posixpath.splitext(filename)[1]:
+        filename += ".html"
+
+    return filename
+
+
+def read_symbol_list(text):
+    """Read the symbols in a symbol list.
+
+    Each line contains a symbol name followed by its location e.g.::
+
+        # Lines starting with # are comments
+        kodo::block::encoder classkodo_1_1block_1_1encoder.html
+        kodo::block::encoder::encode classkodo_1_1block_1_1encoder.html#a1
+
+    :param text: The content of the file as a string
+    :return: List of (name, location) tuples
+    """
+
+    symbols = []
+
+    for line in text.splitlines():
+        line = line.strip()
+
+        if not line or line.startswith("#"):
+            continue
+
+        # The location is the last field, since names may contain spaces
+        # e.g. "operator bool"
+        fields = line.rsplit(None, 1)
+
+        if len(fields) != 2:
+            raise wurfapi_error.WurfapiError(
+                "Invalid line in symbol list: {}".format(line)
+            )
+
+        symbols.append((fields[0], fields[1]))
+
+    return symbols
+
+
+def join_url(url, location):
+    """Join the base url and the location of a symbol.
+
+    :param url: The base url
+    :param location: The location, if it is an absolute url it is used as is
+    :return: The url to the symbol
+    """
+    if not url or "://" in location:
+        return location
+
+    return posixpath.join(url, location)
@@ -13,6 +13,20 @@ def transform_key(data, search_key, scope, function):
     :param function: The function to apply to the key's value
     """
 
+    transform_keys(data=data, functions={search_key: function}, scope=scope)
+
+
+def transform_keys(data, functions, scope):
+    """Runs the functions on all values with the matching keys
+
+    All the keys are transformed in a single walk over the data.
+
+    :param data: The dict containing the keys
+    :param functions: Dict mapping the keys to look for to the function to
+        apply to the key's value
+    :param scope: The current scope where the type has been seen
+    """
+
     if isinstance(data, dict):
         if "scope" in data:
             scope = data["scope"]
@@ -21,24 +35,24 @@ def transform_key(data, search_key, scope, function):
             if found_key == "scope":
                 continue
 
-            if found_key == search_key:
+            function = functions.get(found_key)
+
+            if function is not None:
                 data[found_key] = function(value, scope=scope)
 
-            transform_key(
-                data=value, search_key=search_key, scope=scope, function=function
-            )
+            transform_keys(data=value, functions=functions, scope=scope)
 
-    if isinstance(data, list):
+    elif isinstance(data, list):
         for value in data:
-            transform_key(
-                data=value, search_key=search_key, scope=scope, function=function
-            )
+            transform_keys(data=value, functions=functions, scope=scope)
 
 
 # Keywords used to split a C++ type into it's basic elements:
 keywords = ["<", ">", ")", "(", "&&", "&", "*", ",", "const", "constexpr", " "]
 keyword_pattern = "(" + "|".join([re.escape(k) for k in keywords]) + ")"
+keyword_regex = re.compile(keyword_pattern)
 whitespace_pattern = "(^[ \t]|[ \t]$)"
+whitespace_regex = re.compile(whitespace_pattern)
 spaced_types = [
     "unsigned long long int",
     "long double",
@@ -55,6 +69,16 @@ spaced_types = [
     "unsigned int",
 ]
 
+# The spaced types split into words and spaces e.g. "long int" becomes
+# ("long", " ", "int")
+spaced_type_items = [
+    tuple(res for res in re.split(r"(\s+)", spaced_type) if res)
+    for spaced_type in spaced_types
+]
+
+# The words which can be part of a spaced type
+spaced_type_words = {item for items in spaced_type_items for item in items} - {" "}
+
 
 def split_cpptype(cpptype):
     """Split a C++ type into it's basic string components.
@@ -73,33 +97,77 @@ def split_cpptype(cpptype):
 
     By joining the strings the original type should be returned.
 
+    The same types are seen many times in an API, so the result is cached.
+
     :param cpptype: The C++ type to split as a string
     :return: A list of tokens and basic components.
     """
+    return list(_split_cpptype(cpptype))
 
-    # Split based on keywords
-    items = [res for res in re.split(keyword_pattern, cpptype) if res]
 
-    # Loop through each spaced type and merge it in the list
-    for spaced_type in spaced_types:
-        # split the spaced type into a list of items including spaces
-        spaced_type = [res for res in re.split(r"(\s+)", spaced_type) if res]
+@functools.lru_cache(maxsize=4096)
+def _split_cpptype(cpptype):
 
-        # Check if a subset of items is equal to a spaced type
-        for i in range(len(items) - len(spaced_type) + 1):
-            sub_items = items[i : i + len(spaced_type)]
-            if sub_items == spaced_type:
-                # If it is, remove the subset and insert the spaced type
-                items[i : i + len(spaced_type)] = ["".join(spaced_type)]
+    # Split based on keywords
+    items = [res for res in keyword_regex.split(cpptype) if res]
 
-    # Build the final result
     result = []
 
-    # Make sure we preseve white space
-    for item in items:
-        result += [res for res in re.split(whitespace_pattern, item) if res]
+    index = 0
+    while index < len(items):
+        item = items[index]
 
-    return result
+        if item not in spaced_type_words:
+            # Make sure we preseve white space
+            if item[0] in " \t" or item[-1] in " \t":
+                result += [res for res in whitespace_regex.split(item) if res]
+            else:
+                result.append(item)
+
+            index += 1
+            continue
+
+        # Find the run of words, separated by a single space, which could
+        # make up one or more spaced types
+        end = index + 1
+        while (
+            end + 1 < len(items)
+            and items[end] == " "
+            and items[end + 1] in spaced_type_words
+        ):
+            end += 2
+
+        result += _merge_spaced_types(tuple(items[index:end]))
+        index = end
+
+    return tuple(result)
+
+
+@functools.lru_cache(maxsize=None)
+def _merge_spaced_types(items):
+    """Merge the spaced types in a run of words and spaces.
+
+    The spaced types are merged in the order they are listed, such that
+    e.g. "long long int" becomes ["long", " ", "long int"] since "long int"
+    is listed first.
+
+    :param items: Tuple of words and spaces
+    :return: A list of words, spaces and spaced types
+    """
+    items = list(items)
+
+    for spaced_type in spaced_type_items:
+        # Check if a subset of items is equal to a spaced type
+        size = len(spaced_type)
+        i = 0
+
+        while i + size <= len(items):
+            if tuple(items[i : i + size]) == spaced_type:
+                # If it is, remove the subset and insert the spaced type
+                items[i : i + size] = ["".join(spaced_type)]
+            i += 1
+
+    return items
 
 
 def split_typelist(typelist):
@@ -308,31 +376,35 @@ class LinkMapper(object):
         self.api = api
         self.link_provider = link_provider
 
-    def map(self):
+        # The links found for each distinct (typename, scope, is_type),
+        # including the tokens where no link was found
+        self.links = {}
+
+    def map(self, in_place=False):
         """Perform the actual mapping.
 
-        :return: A modified API with links expanded. The original API dict is
-            not modified.
+        :param in_place: If True the API is modified directly, otherwise a
+            copy of the API is mapped. Use this when the caller owns the API
+            and does not need the original.
+        :return: A modified API with links expanded. Unless in_place is True
+            the original API dict is not modified.
         """
 
-        mapped_api = copy.deepcopy(self.api)
-
-        transform_key(
-            data=mapped_api, search_key="type", scope=None, function=self._map_type
-        )
+        self.links = {}
 
-        transform_key(
-            data=mapped_api,
-            search_key="briefdescription",
-            scope=None,
-            function=self._map_paragraphs,
-        )
+        if in_place:
+            mapped_api = self.api
+        else:
+            mapped_api = copy.deepcopy(self.api)
 
-        transform_key(
+        transform_keys(
             data=mapped_api,
-            search_key="detaileddescription",
+            functions={
+                "type": self._map_type,
+                "briefdescription": self._map_paragraphs,
+                "detaileddescription": self._map_paragraphs,
+            },
             scope=None,
-            function=self._map_paragraphs,
         )
 
         return mapped_api
@@ -426,6 +498,32 @@ class LinkMapper(object):
     def _find_link(self, typename, scope, is_type=False):
         """Given a token e.g. std::function see if we can find a link
 
+        The same tokens are seen over and over again in an API, so each
+        distinct token is only resolved once.
+
+        :param typename: A C++ type name as a string
+        :param scope: A scope as a string otherwise None
+        :param is_type: True if the token is part of a type
+        :return: The link as a dict or None if no link was found
+        """
+        key = (typename, scope, is_type)
+
+        try:
+            link = self.links[key]
+        except KeyError:
+            link = self._resolve_link(typename=typename, scope=scope, is_type=is_type)
+            self.links[key] = link
+
+        if link is None:
+            return None
+
+        # Every occurrence gets its own link, so they can be modified
+        # independently
+        return dict(link)
+
+    def _resolve_link(self, typename, scope, is_type):
+        """Look up the link for a token e.g. std::function
+
         First we check if the type name is found directly in the API. After
         this we try to see if the link_provider has one.
 
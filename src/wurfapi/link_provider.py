@@ -1,10 +1,16 @@
 import os
 import re
-import copy
+import functools
+
+from . import link_inventory
+
+# The locations in the bundled index of the C++ standard library are
+# relative to this url
+CPPREFERENCE_URL = "https://en.cppreference.com/w/"
 
 cppreference_mappings = [
     {
-        "pattern": "(std::)?u?int\d*_t",
+        "pattern": r"(std::)?u?int\d*_t",
         "link": {
             "url": True,
             "value": "https://en.cppreference.com/w/cpp/types/integer",
@@ -48,47 +54,163 @@ cppreference_mappings = [
 ]
 
 
+@functools.lru_cache(maxsize=None)
+def cppreference_index():
+    """Load the bundled index of the C++ standard library symbols.
+
+    The index is loaded the first time it is needed and shared by all
+    LinkProvider instances.
+
+    :return: A link_inventory.SymbolIndex
+    """
+    index = link_inventory.SymbolIndex()
+    index.load(
+        path=os.path.join(os.path.dirname(__file__), "link_files", "cppreference.txt"),
+        url=CPPREFERENCE_URL,
+    )
+
+    return index
+
+
 class LinkProvider(object):
-    def __init__(self, user_mappings):
+    def __init__(self, user_mappings, symbol_index=None, cache_size=4096):
+        """Create a new instance
+
+        :param user_mappings: List of mappings, each a dict with a "pattern"
+            regular expression and the "link" to use if a type name matches
+            the pattern. The user mappings are tried before the default
+            mappings.
+        :param symbol_index: A link_inventory.SymbolIndex with symbols
+            documented elsewhere or None. The index is checked after the
+            user mappings and before the C++ standard library.
+        :param cache_size: The maximum number of type names for which the
+            links are cached.
+        """
         self.user_mappings = user_mappings
+        self.symbol_index = symbol_index
+        self.mappings = user_mappings + cppreference_mappings
+        self.patterns = [re.compile(m["pattern"]) for m in self.mappings]
+
+        # All the patterns are combined in one regular expression, where the
+        # pattern of each mapping is a named group. If the patterns cannot be
+        # combined, we match the patterns one by one.
+        self.regex = _combine(self.patterns)
+
+        self._find_link = functools.lru_cache(maxsize=cache_size)(
+            self._find_link_uncached
+        )
 
     def find_link(self, typename):
         """Given a token e.g. std::function see if we can find a link
 
         First we check if the type name is found in the user mapping. After
-        this we try our default mappings.
+        this we try the symbol index, the bundled index of the C++ standard
+        library and finally our default mappings.
 
         :param typename: A C++ type name as a string
         :return: A link dictionary or None
         """
 
-        mappings_list = [self.user_mappings, cppreference_mappings]
+        link = self._find_link(typename)
+
+        if link is None:
+            return None
+
+        # The cached link is shared, so the caller gets a copy
+        return dict(link)
+
+    def _find_link_uncached(self, typename):
+        index, groups = self._match(typename=typename)
+
+        if index is not None and index < len(self.user_mappings):
+            return _format_link(link=self.mappings[index]["link"], groups=groups)
+
+        if self.symbol_index is not None:
+            link = self.symbol_index.find_link(typename=typename)
+
+            if link is not None:
+                return link
 
-        for mappings in mappings_list:
-            link = self._check_mapping(mappings=mappings, typename=typename)
+        if typename.startswith("std::"):
+            link = cppreference_index().find_link(typename=typename)
 
-            if link:
+            if link is not None:
                 return link
 
+        if index is not None:
+            return _format_link(link=self.mappings[index]["link"], groups=groups)
+
         return None
 
-    def _check_mapping(self, mappings, typename):
-        for mapping in mappings:
-            match = re.match(mapping["pattern"], typename)
+    def _match(self, typename):
+        """Find the first mapping with a pattern matching the type name.
 
-            if match:
-                # We take the link dictionary and try to replace any format
-                # strings with the match (if any)
-                link = copy.deepcopy(mapping["link"])
+        :param typename: A C++ type name as a string
+        :return: Tuple with the index of the mapping and the groups of the
+            match or (None, None) if no pattern matched.
+        """
+        if self.regex is None:
+            for index, pattern in enumerate(self.patterns):
+                match = pattern.match(typename)
 
-                # The match.groups() returns a tuple with all the matching
-                # groups. We unpack that and pass it to format which allows
-                # us to write links like "http://somereference.com/{0}" where
-                # {0} gets replaced with the content for the first match group
-                # and so forward. If there are no match groups nothing gets
-                # replaced.
-                link["value"] = link["value"].format(*match.groups())
+                if match:
+                    return index, match.groups()
+
+            return None, None
+
+        match = self.regex.match(typename)
+
+        if not match:
+            return None, None
+
+        # The name of the group which matched tells us the mapping, the
+        # groups of the mapping's pattern follow the named group
+        index = int(match.lastgroup[len("mapping") :])
+        start = match.lastindex
+        groups = match.groups()[start : start + self.patterns[index].groups]
+
+        return index, groups
 
-                return link
 
+def _combine(patterns):
+    """Combine the patterns in one regular expression.
+
+    Matching the combined regular expression finds the same mapping as
+    matching the patterns one by one, since the alternatives are tried from
+    left to right.
+
+    :param patterns: List of compiled patterns
+    :return: The compiled regular expression or None if the patterns cannot
+        be combined e.g. because they use named groups or backreferences.
+    """
+    for pattern in patterns:
+        if pattern.groupindex or re.search(r"\\[1-9]|\(\?P=", pattern.pattern):
+            return None
+
+    combined = "|".join(
+        "(?P<mapping{}>{})".format(index, pattern.pattern)
+        for index, pattern in enumerate(patterns)
+    )
+
+    try:
+        return re.compile(combined)
+    except re.error:
         return None
+
+
+def _format_link(link, groups):
+    """Create the link for a match.
+
+    The groups of the match are passed to format which allows us to write
+    links like "http://somereference.com/{0}" where {0} gets replaced with
+    the content for the first match group and so forward. If there are no
+    match groups nothing gets replaced.
+
+    :param link: The link dictionary of the mapping
+    :param groups: Tuple with the matching groups
+    :return: A new link dictionary
+    """
+    link = dict(link)
+    link["value"] = link["value"].format(*groups)
+
+    return link
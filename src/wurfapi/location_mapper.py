@@ -1,4 +1,5 @@
 import os
+import functools
 
 try:
     import pathlib
@@ -7,42 +8,59 @@ except (ImportError):
 
 
 class LocationMapper(object):
-    def __init__(self, project_root, include_paths, log):
+    def __init__(self, project_root, include_paths, log, cache_size=16384):
         """Instantiate new object
 
         :param project_root: Absolute path to the root of the project as a
             string.
         :param include_paths: List of absolute include paths as strings
+        :param log: Log object
+        :param cache_size: The maximum number of paths for which the
+            results are cached.
         """
 
         self.project_root = pathlib.Path(project_root).resolve()
         self.include_paths = [pathlib.Path(p).resolve() for p in include_paths]
         self.log = log
+        self.cache_size = cache_size
 
-    def to_include(self, path):
-        """
-        :param path: The path to a file as a string.
-        :return: The include directive if file found in the include paths
-        """
-        path = pathlib.Path(path)
+        self._create_caches()
 
-        if not path.is_absolute():
-            path = self.project_root.joinpath(path)
+    def _create_caches(self):
+        # Resolving a path requires file system calls and the same paths
+        # are mapped over and over again, so we cache the results
+        self._resolve = functools.lru_cache(maxsize=self.cache_size)(
+            self._resolve_uncached
+        )
+        self._to_include = functools.lru_cache(maxsize=self.cache_size)(
+            self._to_include_uncached
+        )
 
-        path = path.resolve()
+        # Maps an include path to its position in the include paths. If an
+        # include path is listed twice the first position is used.
+        self.include_index = {}
 
-        for include_path in self.include_paths:
+        for index, include_path in enumerate(self.include_paths):
+            self.include_index.setdefault(include_path, index)
 
-            relative_path = self._relative_path(path=path, start=include_path)
+    def __getstate__(self):
+        # The caches are not picklable, they are created again when
+        # unpickling
+        state = self.__dict__.copy()
+        del state["_resolve"]
+        del state["_to_include"]
+        return state
 
-            if relative_path:
-                return relative_path
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._create_caches()
 
-        self.log.debug(
-            "Unable to find file %s in includes %s", path, self.include_paths
-        )
-
-        return None
+    def to_include(self, path):
+        """
+        :param path: The path to a file as a string.
+        :return: The include directive if file found in the include paths
+        """
+        return self._to_include(path)
 
     def to_path(self, path):
         # type: (str) -> str
@@ -51,12 +69,7 @@ class LocationMapper(object):
         :return: The relative path to the file from the project root
         """
 
-        path = pathlib.Path(path)
-
-        if not path.is_absolute():
-            path = self.project_root.joinpath(path)
-
-        path = path.resolve()
+        path = self._resolve(path)
 
         relative_path = self._relative_path(path=path, start=self.project_root)
 
@@ -69,6 +82,50 @@ class LocationMapper(object):
 
         return relative_path
 
+    def log_cache_info(self):
+        """Write the cache hit rates to the debug log"""
+
+        for name, cache in [("resolve", self._resolve), ("include", self._to_include)]:
+            info = cache.cache_info()
+
+            self.log.debug(
+                "LocationMapper %s cache hits %d misses %d size %d",
+                name,
+                info.hits,
+                info.misses,
+                info.currsize,
+            )
+
+    def _resolve_uncached(self, path):
+        path = pathlib.Path(path)
+
+        if not path.is_absolute():
+            path = self.project_root.joinpath(path)
+
+        return path.resolve()
+
+    def _to_include_uncached(self, path):
+        path = self._resolve(path)
+
+        # Look up the parent directories in the include index and use the
+        # include path listed first
+        found = None
+
+        for parent in path.parents:
+            index = self.include_index.get(parent)
+
+            if index is not None and (found is None or index < found):
+                found = index
+
+        if found is None:
+            self.log.debug(
+                "Unable to find file %s in includes %s", path, self.include_paths
+            )
+
+            return None
+
+        return self._relative_path(path=path, start=self.include_paths[found])
+
     def _relative_path(self, path, start):
 
         if start not in path.parents:
@@ -0,0 +1,88 @@
+import os
+import pickle
+import hashlib
+
+
+class ParserCache(object):
+    def __init__(self, cache_path, log):
+        """Persistent cache for the parsed Doxygen compounds.
+
+        Most of the compound XML files are unchanged between builds. The
+        cache stores the API fragment parsed from each compound, such that
+        only the changed compounds have to be parsed again.
+
+        :param cache_path: The directory where the fragments are stored.
+        :param log: Log object
+        """
+        self.cache_path = cache_path
+        self.log = log
+
+    def key(self, xml_path, configuration):
+        """Compute the cache key for a compound.
+
+        :param xml_path: The path to the compound XML file
+        :param configuration: String with the other inputs to the parser
+            e.g. the parser version
+        :return: The key as a hex string
+        """
+        sha1 = hashlib.sha1()
+
+        sha1.update(configuration.encode("utf-8"))
+        sha1.update(b"\0")
+
+        with open(xml_path, "rb") as f:
+            sha1.update(f.read())
+
+        return sha1.hexdigest()
+
+    def lookup(self, key):
+        """Look for a cached fragment.
+
+        :param key: The key returned by key(...)
+        :return: The fragment or None
+        """
+        path = os.path.join(self.cache_path, key)
+
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            self.log.debug("Parser cache entry %s not readable: %s", key, e)
+            return None
+
+    def store(self, key, fragment):
+        """Store a fragment in the cache.
+
+        :param key: The key returned by key(...)
+        :param fragment: The parsed fragment, must be picklable
+        """
+        if not os.path.isdir(self.cache_path):
+            os.makedirs(self.cache_path)
+
+        path = os.path.join(self.cache_path, key)
+
+        # Write to a temporary file first such that an interrupted build
+        # does not leave a partial entry
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(fragment, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(path + ".tmp", path)
+
+    def prune(self, keys):
+        """Remove the entries not in keys.
+
+        :param keys: The keys used in the current build
+        """
+        if not os.path.isdir(self.cache_path):
+            return
+
+        keys = set(keys)
+
+        for name in os.listdir(self.cache_path):
+            if name in keys:
+                continue
+
+            os.remove(os.path.join(self.cache_path, name))
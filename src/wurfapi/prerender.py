@@ -0,0 +1,196 @@
+import os
+import re
+import logging
+import concurrent.futures
+
+from . import render_cache
+from . import template_render
+
+# The first line of a wurfapi directive e.g. ".. wurfapi:: class_synopsis.rst"
+DIRECTIVE = re.compile(r"^(?P<indent>\s*)\.\.\s+wurfapi::(?P<argument>.*)$")
+
+# An option line e.g. ":selector: project::coder"
+OPTION = re.compile(r"^:(?P<name>[\w-]+):(?:\s+(?P<value>.*))?$")
+
+
+def read_directives(text):
+    """Find the wurfapi directives in a rst document.
+
+    This only looks at the text, so a directive inside e.g. a literal block
+    is also found. Rendering such a directive does no harm, the result is
+    just never used.
+
+    :param text: The content of the rst document as a string
+    :return: List of (filename, selector, user_data) tuples, the selector
+        and user_data are None if the option is not given
+    """
+    lines = text.splitlines()
+    directives = []
+    index = 0
+
+    while index < len(lines):
+        match = DIRECTIVE.match(lines[index])
+        index += 1
+
+        if not match:
+            continue
+
+        indent = len(match.group("indent"))
+        argument = [match.group("argument")]
+        options = {}
+        option = None
+
+        # The arguments and options are the lines indented more than the
+        # directive, up to the first blank line
+        while index < len(lines):
+            line = lines[index]
+
+            if not line.strip():
+                break
+
+            if len(line) - len(line.lstrip()) <= indent:
+                break
+
+            index += 1
+            line = line.strip()
+            option_match = OPTION.match(line)
+
+            if option_match:
+                option = option_match.group("name")
+                options[option] = option_match.group("value") or ""
+            elif option is not None:
+                options[option] += "\n" + line
+            else:
+                argument.append(line)
+
+        # Same as docutils.parsers.rst.directives.path(...)
+        filename = "".join(a.strip() for a in argument)
+
+        if filename:
+            directives.append(
+                (filename, options.get("selector"), options.get("user_data"))
+            )
+
+    return directives
+
+
+def find_directives(srcdir, suffixes, exclude):
+    """Find the wurfapi directives in the rst documents of a project.
+
+    :param srcdir: The Sphinx source directory
+    :param suffixes: The file extensions of the documents e.g. [".rst"]
+    :param exclude: Function returning True for the paths relative to the
+        srcdir which should be skipped
+    :return: List of distinct (filename, selector, user_data) tuples
+    """
+    directives = []
+    found = set()
+
+    for dirpath, dirnames, filenames in os.walk(srcdir):
+        relative = os.path.relpath(dirpath, srcdir)
+
+        def relpath(name):
+            if relative == os.curdir:
+                return name
+            return os.path.join(relative, name)
+
+        dirnames[:] = sorted(d for d in dirnames if not exclude(relpath(d)))
+
+        for filename in sorted(filenames):
+            if not filename.endswith(tuple(suffixes)) or exclude(relpath(filename)):
+                continue
+
+            with open(os.path.join(dirpath, filename), "r", encoding="utf-8") as f:
+                try:
+                    text = f.read()
+                except UnicodeDecodeError:
+                    continue
+
+            for directive in read_directives(text=text):
+                if directive not in found:
+                    found.add(directive)
+                    directives.append(directive)
+
+    return directives
+
+
+def prerender(directives, api, user_path, cache_path, template_cache_path, workers):
+    """Render the directives into the render cache using a pool of worker
+    processes.
+
+    Directives which fail to render are skipped, the error is reported when
+    Sphinx runs the directive.
+
+    :param directives: List of (filename, selector, user_data) tuples
+    :param api: The API dictionary
+    :param user_path: The directory with the user templates or None
+    :param cache_path: The directory of the render cache
+    :param template_cache_path: The directory of the template bytecode cache
+    :param workers: The number of worker processes
+    :return: Dict with the number of "hits", "misses" and "failures"
+    """
+    counts = {"hits": 0, "misses": 0, "failures": 0}
+
+    if not directives:
+        return counts
+
+    # A few chunks per worker evens out the differences in template sizes
+    chunk_count = min(len(directives), workers * 4)
+    chunk_size = -(-len(directives) // chunk_count)
+
+    chunks = [
+        directives[i : i + chunk_size] for i in range(0, len(directives), chunk_size)
+    ]
+
+    # The API is passed to each worker once, not with every chunk
+    with concurrent.futures.ProcessPoolExecutor(
+        workers,
+        initializer=_init_worker,
+        initargs=(api, user_path, cache_path, template_cache_path),
+    ) as executor:
+        for result in executor.map(_prerender_worker, chunks):
+            for key, value in result.items():
+                counts[key] += value
+
+    return counts
+
+
+# The render cache and templates used by a worker process, see _init_worker
+_worker = {}
+
+
+def _init_worker(api, user_path, cache_path, template_cache_path):
+    _worker["cache"] = render_cache.RenderCache(
+        cache_path=cache_path, api=api, log=logging.getLogger(__name__)
+    )
+    _worker["template"] = template_render.TemplateRender(
+        user_path=user_path, cache_path=template_cache_path
+    )
+
+
+def _prerender_worker(directives):
+    """Render a chunk of directives in a worker process.
+
+    :param directives: List of (filename, selector, user_data) tuples
+    :return: Dict with the number of "hits", "misses" and "failures"
+    """
+    cache = _worker["cache"]
+    hits, misses = cache.hits, cache.misses
+    failures = 0
+
+    for filename, selector, user_data in directives:
+        try:
+            cache.render(
+                template=_worker["template"],
+                selector=selector,
+                filename=filename,
+                user_data=user_data,
+            )
+        except Exception:
+            failures += 1
+
+    return {
+        "hits": cache.hits - hits,
+        "misses": cache.misses - misses - failures,
+        "failures": failures,
+    }
@@ -0,0 +1,225 @@
+import os
+import json
+import pickle
+import hashlib
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+class RecordingApi(Mapping):
+    def __init__(self, api):
+        """Read only view of the API recording the selectors looked up.
+
+        :param api: The API dictionary
+        """
+        self.api = api
+
+        # The selectors looked up, including the ones not in the API
+        self.selectors = set()
+
+        # True if the whole API was used e.g. by iterating over it
+        self.everything = False
+
+    def __getitem__(self, selector):
+        if not self.everything:
+            self.selectors.add(selector)
+
+        return self.api[selector]
+
+    def __contains__(self, selector):
+        if not self.everything:
+            self.selectors.add(selector)
+
+        return selector in self.api
+
+    def __iter__(self):
+        self.everything = True
+        return iter(self.api)
+
+    def __len__(self):
+        self.everything = True
+        return len(self.api)
+
+
+class RenderCache(object):
+    def __init__(self, cache_path, api, log):
+        """Persistent cache for the rendered directives.
+
+        Each entry stores the rendered rst together with a digest of the
+        API entries used by the template. The rst is reused if the template,
+        selector and user data are the same and none of the API entries
+        changed.
+
+        :param cache_path: The directory where the entries are stored.
+        :param api: The API dictionary
+        :param log: Log object
+        """
+        self.cache_path = cache_path
+        self.api = api
+        self.log = log
+
+        # The digests of the API entries, computed when first needed
+        self.digests = {}
+        self.api_digest = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, template, selector, filename, user_data=None):
+        """Render a template or return the cached rst.
+
+        :param template: The TemplateRender object
+        :param selector: The selector passed to the template or None
+        :param filename: The name of the template
+        :param user_data: The user data passed to the template or None
+        :return: Tuple with the rendered rst as a string and the cache key
+            of the directive
+        """
+        key = self.key(
+            template=template, selector=selector, filename=filename, user_data=user_data
+        )
+
+        entry = self.lookup(key=key)
+
+        if entry is not None and self._is_current(entry=entry):
+            self.hits += 1
+            return entry["rst"], key
+
+        self.misses += 1
+
+        api = RecordingApi(api=self.api)
+
+        data = template.render(
+            selector=selector, api=api, filename=filename, user_data=user_data
+        )
+
+        entry = {"rst": data, "api": None, "dependencies": None}
+
+        if api.everything:
+            entry["api"] = self._api_digest()
+        else:
+            entry["dependencies"] = {s: self._digest(s) for s in api.selectors}
+
+        self.store(key=key, entry=entry)
+
+        return data, key
+
+    def key(self, template, selector, filename, user_data):
+        """Compute the cache key for a directive.
+
+        :return: The key as a hex string
+        """
+        sha1 = hashlib.sha1()
+
+        for value in [template.checksum(), filename, selector, user_data]:
+            sha1.update(repr(value).encode("utf-8"))
+            sha1.update(b"\0")
+
+        return sha1.hexdigest()
+
+    def lookup(self, key):
+        """Look for a cached entry.
+
+        :param key: The key returned by key(...)
+        :return: The entry or None
+        """
+        path = os.path.join(self.cache_path, key)
+
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            self.log.debug("Render cache entry %s not readable: %s", key, e)
+            return None
+
+    def store(self, key, entry):
+        """Store an entry in the cache.
+
+        :param key: The key returned by key(...)
+        :param entry: The entry dictionary
+        """
+        if not os.path.isdir(self.cache_path):
+            os.makedirs(self.cache_path)
+
+        path = os.path.join(self.cache_path, key)
+
+        # Write to a temporary file first such that an interrupted build
+        # does not leave a partial entry. The process id keeps parallel
+        # builds from writing to the same file.
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+
+        with open(tmp_path, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(tmp_path, path)
+
+    def prune(self, keys):
+        """Remove the entries not in keys.
+
+        :param keys: The keys used by the documents of the current build,
+            including the documents Sphinx did not read again
+        """
+        if not os.path.isdir(self.cache_path):
+            return
+
+        keys = set(keys)
+
+        for name in os.listdir(self.cache_path):
+            # Leave the entries being written by other builds alone
+            if name in keys or name.endswith(".tmp"):
+                continue
+
+            os.remove(os.path.join(self.cache_path, name))
+
+    def log_cache_info(self):
+        """Write the cache hits and misses to the log"""
+        self.log.info("Render cache %d hits %d misses", self.hits, self.misses)
+
+    def _is_current(self, entry):
+        if entry["dependencies"] is None:
+            return entry["api"] == self._api_digest()
+
+        for selector, digest in entry["dependencies"].items():
+            if self._digest(selector) != digest:
+                return False
+
+        return True
+
+    def _digest(self, selector):
+        # Missing selectors have the digest None, so a template testing
+        # whether a selector is in the API is rendered again if it is added
+        try:
+            return self.digests[selector]
+        except KeyError:
+            pass
+
+        try:
+            entry = self.api[selector]
+        except (KeyError, TypeError):
+            return None
+
+        data = json.dumps(entry, sort_keys=True, default=repr)
+        digest = hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+        self.digests[selector] = digest
+
+        return digest
+
+    def _api_digest(self):
+        if self.api_digest is None:
+            sha1 = hashlib.sha1()
+
+            for selector in sorted(self.api):
+                sha1.update(selector.encode("utf-8"))
+                sha1.update(b"\0")
+                sha1.update(self._digest(selector).encode("utf-8"))
+
+            self.api_digest = sha1.hexdigest()
+
+        return self.api_digest
@@ -0,0 +1,90 @@
+import heapq
+import collections
+
+
+class SelectorIndex(object):
+    def __init__(self, selectors, gram_size=3):
+        """Index for suggesting the selectors closest to a misspelled one.
+
+        The selectors are split into n-grams e.g. for trigrams "a::b" gives
+        " a:", "a::", "::b" and ":b ". Finding the suggestions only looks
+        at the selectors sharing an n-gram with the misspelled selector, so
+        it stays fast for APIs with many selectors.
+
+        The index is built the first time it is used, since it is only
+        needed when reporting errors.
+
+        :param selectors: The selectors e.g. the keys of the API dictionary
+        :param gram_size: The number of characters in each n-gram
+        """
+        self.selectors = list(selectors)
+        self.gram_size = gram_size
+
+        # Maps an n-gram to the indices of the selectors containing it
+        self.grams = None
+
+        # The number of distinct n-grams in each selector
+        self.sizes = None
+
+    def suggest(self, selector, count=5):
+        """Find the selectors closest to the given selector.
+
+        :param selector: The selector which was not found
+        :param count: The maximum number of suggestions
+        :return: List of selectors, the closest first
+        """
+        if self.grams is None:
+            self._build()
+
+        query = self._split(text=selector)
+
+        # Count the n-grams each selector shares with the query
+        common = collections.Counter()
+
+        for gram in query:
+            common.update(self.grams.get(gram, ()))
+
+        def similarity(item):
+            index, shared = item
+            score = shared / float(len(query) + self.sizes[index] - shared)
+
+            # Prefer the first selector if the scores are equal, such that
+            # the suggestions do not depend on the order of the n-grams
+            return (score, -index)
+
+        closest = heapq.nlargest(count, common.items(), key=similarity)
+
+        return [self.selectors[index] for index, _ in closest]
+
+    def _build(self):
+        grams = collections.defaultdict(list)
+        sizes = []
+
+        for index, selector in enumerate(self.selectors):
+            split = self._split(text=selector)
+            sizes.append(len(split))
+
+            for gram in split:
+                grams[gram].append(index)
+
+        self.grams = dict(grams)
+        self.sizes = sizes
+
+    def _split(self, text):
+        # Pad the text such that the first and last characters are part of
+        # as many n-grams as the others
+        text = " " + str(text).lower() + " "
+        size = self.gram_size
+
+        return set(text[i : i + size] for i in range(len(text) - size + 1))
+
+
+def suggest(selectors, selector, count=5):
+    """Find the selectors closest to the given selector.
+
+    :param selectors: The selectors e.g. the keys of the API dictionary
+    :param selector: The selector which was not found
+    :param count: The maximum number of suggestions
+    :return: List of selectors, the closest first
+    """
+    return SelectorIndex(selectors=selectors).suggest(selector=selector, count=count)
@@ -1,12 +1,223 @@
 import os
+import hashlib
 import functools
 import operator
 import jinja2
 
 
+class ApiIndex(object):
+    def __init__(self, api):
+        """Index of the API used by the api_filter and api_sort filters.
+
+        The index maps the values of an attribute e.g. "kind" to the
+        selectors having that value, such that filtering is a lookup
+        instead of checking every element. The index for an attribute is
+        built the first time it is used. The API must not be changed while
+        the index is used.
+
+        :param api: The API dictionary
+        """
+        self.api = api
+
+        # Maps an attribute to a dict from value to the set of selectors
+        # or to None if the values cannot be indexed e.g. lists
+        self.attributes = {}
+
+        # Maps the attributes passed to api_filter to the matched selectors,
+        # the templates use the same few filters over and over
+        self.matches = {}
+
+        # Maps the keys passed to api_sort to a dict from selector to the
+        # sort key
+        self.sort_keys = {}
+
+        # The scope tree, maps a selector to the selectors of its children
+        # and its parent. Built the first time it is used.
+        self.children = None
+        self.parents = None
+
+        # Maps a selector to the list of its descendants
+        self.descendant_lists = {}
+
+    def match(self, attributes):
+        """Find the selectors matching the attributes.
+
+        :param attributes: Dict with the attributes passed to api_filter
+        :return: The set of selectors or None if the attributes cannot be
+            looked up in the index
+        """
+        if not attributes:
+            return None
+
+        # A list value matches any of its items, so it must be told apart
+        # from a tuple value
+        key = tuple(
+            (k, tuple(v), True) if type(v) is list else (k, v, False)
+            for k, v in sorted(attributes.items())
+        )
+
+        try:
+            return self.matches[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return None
+
+        matched = self._match(attributes=attributes)
+        self.matches[key] = matched
+
+        return matched
+
+    def _match(self, attributes):
+        matched = None
+
+        for key, value in attributes.items():
+            values = self._values(key=key)
+
+            if values is None:
+                return None
+
+            try:
+                if type(value) is list:
+                    found = set()
+                    for v in value:
+                        found.update(values.get(v, ()))
+                else:
+                    found = values.get(value, frozenset())
+            except TypeError:
+                return None
+
+            matched = found if matched is None else matched & found
+
+        return matched
+
+    def sort_values(self, keys):
+        """The cached sort keys used by api_sort.
+
+        :param keys: The keys passed to api_sort
+        :return: Dict from selector to the sort key
+        """
+        return self.sort_keys.setdefault(tuple(keys), {})
+
+    def descendants(self, selector):
+        """Find the selectors nested in the scope of a selector.
+
+        :param selector: The selector e.g. a namespace or a class
+        :return: List of the descendants, each followed by its own
+            descendants in the order of the "members" lists
+        """
+        try:
+            return self.descendant_lists[selector]
+        except KeyError:
+            pass
+
+        if self.children is None:
+            self._build_scopes()
+
+        result = []
+        visited = {selector}
+        stack = list(reversed(self.children.get(selector, ())))
+
+        while stack:
+            child = stack.pop()
+
+            if child in visited:
+                continue
+
+            visited.add(child)
+            result.append(child)
+            stack.extend(reversed(self.children.get(child, ())))
+
+        self.descendant_lists[selector] = result
+
+        return result
+
+    def ancestors(self, selector):
+        """Find the selectors whose scope contains a selector.
+
+        :param selector: The selector e.g. a function
+        :return: List of the ancestors, the parent first
+        """
+        if self.parents is None:
+            self._build_scopes()
+
+        result = []
+        visited = {selector}
+        parent = self.parents.get(selector)
+
+        while parent is not None and parent not in visited:
+            visited.add(parent)
+            result.append(parent)
+            parent = self.parents.get(parent)
+
+        return result
+
+    def _build_scopes(self):
+        children = {}
+        parents = {}
+
+        # The members lists give the children in the order they are
+        # documented
+        for selector, element in self.api.items():
+            for member in element.get("members", ()):
+                if member in self.api and member not in parents:
+                    parents[member] = selector
+                    children.setdefault(selector, []).append(member)
+
+        # Entries not listed as a member are placed in their scope
+        for selector, element in self.api.items():
+            if selector in parents:
+                continue
+
+            scope = element.get("scope")
+
+            if scope and scope != selector and scope in self.api:
+                parents[selector] = scope
+                children.setdefault(scope, []).append(selector)
+
+        self.children = children
+        self.parents = parents
+
+    def _values(self, key):
+        try:
+            return self.attributes[key]
+        except KeyError:
+            pass
+
+        values = {}
+
+        try:
+            for selector, element in self.api.items():
+                if key in element:
+                    values.setdefault(element[key], set()).add(selector)
+        except TypeError:
+            values = None
+
+        self.attributes[key] = values
+
+        return values
+
+
 @jinja2.pass_context
 def api_filter(ctx, selectors, **attributes):
 
+    api = ctx["api"]
+    index = ctx.get("api_index")
+    matched = index.match(attributes=attributes) if index else None
+
+    if matched is not None:
+        result = []
+
+        for selector in selectors:
+            # Keep the KeyError for selectors not in the API
+            if selector not in api:
+                raise KeyError(selector)
+
+            if selector in matched:
+                result.append(selector)
+
+        return result
+
     result = []
 
     def match(element):
@@ -31,7 +242,7 @@ def api_filter(ctx, selectors, **attributes):
         return True
 
     for selector in selectors:
-        element = ctx["api"][selector]
+        element = api[selector]
 
         if match(element):
             result.append(selector)
@@ -41,24 +252,139 @@ def api_filter(ctx, selectors, **attributes):
 
 @jinja2.pass_context
 def api_sort(ctx, selectors, keys, reverse=False):
+
+    api = ctx["api"]
+    index = ctx.get("api_index")
+    values = index.sort_values(keys=keys) if index else {}
+
     def compare(selector):
+        # Keep the KeyError for selectors not in the API
+        if selector not in api:
+            raise KeyError(selector)
+
+        try:
+            return values[selector]
+        except KeyError:
+            pass
+
         # Get the nested value using approach described here:
         # https://stackoverflow.com/a/14692747/1717320
-        return functools.reduce(operator.getitem, keys, ctx["api"][selector])
+        value = functools.reduce(operator.getitem, keys, api[selector])
+        values[selector] = value
+
+        return value
 
     # The sort should be stable
     return sorted(selectors, key=compare, reverse=reverse)
 
 
+@jinja2.pass_context
+def api_group_by(ctx, selectors, key, default=None):
+    """Partition the selectors by the value of an attribute in one pass.
+
+    Example::
+
+        {% for kind, members in class["members"] | api_group_by("kind") %}
+
+    :param selectors: The selectors to partition
+    :param key: The attribute e.g. "kind" or "access"
+    :param default: The value used for elements without the attribute
+    :return: List of (value, selectors) tuples in the order the values are
+        first seen
+    """
+    api = ctx["api"]
+    groups = {}
+
+    for selector in selectors:
+        value = api[selector].get(key, default)
+
+        try:
+            groups[value].append(selector)
+        except KeyError:
+            groups[value] = [selector]
+
+    return list(groups.items())
+
+
+@jinja2.pass_context
+def api_descendants(ctx, selector, **attributes):
+    """Find the selectors nested in the scope of a selector.
+
+    Example::
+
+        {% set functions = "project" | api_descendants(kind="function") %}
+
+    :param selector: The selector e.g. a namespace or a class
+    :param attributes: Only return the descendants matching the attributes,
+        see api_filter
+    :return: List of selectors
+    """
+    api = ctx["api"]
+
+    if selector not in api:
+        raise KeyError(selector)
+
+    selectors = _scope_index(ctx=ctx).descendants(selector=selector)
+
+    return api_filter(ctx, selectors, **attributes)
+
+
+@jinja2.pass_context
+def api_ancestors(ctx, selector, **attributes):
+    """Find the selectors whose scope contains a selector.
+
+    Example::
+
+        {% set classes = selector | api_ancestors(kind=["class", "struct"]) %}
+
+    :param selector: The selector e.g. a function
+    :param attributes: Only return the ancestors matching the attributes,
+        see api_filter
+    :return: List of selectors, the parent first
+    """
+    api = ctx["api"]
+
+    if selector not in api:
+        raise KeyError(selector)
+
+    selectors = _scope_index(ctx=ctx).ancestors(selector=selector)
+
+    return api_filter(ctx, selectors, **attributes)
+
+
+def _scope_index(ctx):
+    # The scope tree is built from the "members" and "scope" of every entry,
+    # so the result depends on the whole API and not just the selectors
+    # visited. Iterating the API marks this for the RecordingApi used by
+    # the render cache.
+    iter(ctx["api"])
+
+    return _context_index(ctx=ctx)
+
+
+def _context_index(ctx):
+    # Templates rendered by TemplateRender get the shared index, otherwise
+    # we build one for the API
+    index = ctx.get("api_index")
+
+    if index is None:
+        index = ApiIndex(api=ctx["api"])
+
+    return index
+
+
 class TemplateRender(object):
     """Finds the template on the file system with a given name."""
 
-    def __init__(self, user_path):
+    def __init__(self, user_path, cache_path=None):
         """Create a new instance.
 
         :param user_path: The directory on the file system where the user
             provided templates are located as a string. If user_path is None
             no user specified templates will be loaded.
+        :param cache_path: The directory where the compiled templates are
+            stored between builds as a string. If cache_path is None the
+            templates are compiled again in every build.
         """
 
         # We have two loaders either we load from the package
@@ -74,8 +400,19 @@ class TemplateRender(object):
             jinja2.PackageLoader(package_name="wurfapi", package_path="template_files")
         )
 
+        # Jinja checks the source of a template against the cached bytecode,
+        # so changes to the user templates are picked up
+        bytecode_cache = None
+
+        if cache_path:
+            if not os.path.isdir(cache_path):
+                os.makedirs(cache_path)
+
+            bytecode_cache = jinja2.FileSystemBytecodeCache(directory=cache_path)
+
         self.environment = jinja2.Environment(
             loader=jinja2.ChoiceLoader(loaders=loaders),
+            bytecode_cache=bytecode_cache,
             trim_blocks=True,
             lstrip_blocks=True,
             # Enable the do statement:
@@ -90,12 +427,65 @@ class TemplateRender(object):
 
         self.environment.filters["api_sort"] = api_sort
         self.environment.filters["api_filter"] = api_filter
+        self.environment.filters["api_group_by"] = api_group_by
+        self.environment.filters["api_descendants"] = api_descendants
+        self.environment.filters["api_ancestors"] = api_ancestors
+
+        # The index of the last API rendered, see _api_index(...)
+        self._index = None
+
+        # Computed by checksum() when first needed
+        self._checksum = None
+
+    def checksum(self):
+        """Compute a checksum of the templates and the filters.
+
+        The checksum changes if any of the templates which can be loaded
+        changes, since a template may use the others e.g. macros.rst.
+
+        :return: The checksum as a hex string
+        """
+        if self._checksum is not None:
+            return self._checksum
+
+        sha1 = hashlib.sha1()
+
+        with open(__file__, "rb") as f:
+            sha1.update(f.read())
+
+        for name in sorted(self.environment.list_templates()):
+            source, _, _ = self.environment.loader.get_source(
+                environment=self.environment, template=name
+            )
+
+            sha1.update(b"\0" + name.encode("utf-8") + b"\0")
+            sha1.update(source.encode("utf-8"))
+
+        self._checksum = sha1.hexdigest()
+
+        return self._checksum
 
     def render(self, selector, api, filename, user_data=None):
         """Render the template"""
 
         template = self.environment.get_template(name=filename)
-        params = {"api": api, "selector": selector}
+        params = {"api": api, "selector": selector, "api_index": self._api_index(api)}
         if user_data is not None:
             params["user_data"] = user_data
         return template.render(**params)
+
+    def _api_index(self, api):
+        """Return the index for the API.
+
+        The directives render the same API, so the index is built once and
+        shared by all of them.
+
+        :param api: The API dictionary or a view of it e.g. the RecordingApi
+            used by the render cache
+        """
+        api = getattr(api, "api", api)
+
+        if self._index is None or self._index.api is not api:
+            self._index = ApiIndex(api=api)
+
+        return self._index
@@ -15,19 +15,26 @@ import sphinx.domains.std
 import sphinx.roles
 import sphinx.util
 import sphinx.util.logging
+import sphinx.util.matching
 import sphinx.util.nodes
 import sphinx.util.docutils
 
 import json
 import slugify
 
+from . import doxygen_cache
 from . import doxygen_generator
 from . import doxygen_parser
 from . import doxygen_downloader
+from . import parser_cache
+from . import prerender
+from . import render_cache
 from . import run
+from . import selector_index
 from . import template_render
 from . import wurfapi_error
 from . import link_mapper
+from . import link_inventory
 from . import link_provider
 from . import location_mapper
 from . import check_api_schema
@@ -137,27 +144,45 @@ class WurfapiDirective(sphinx.util.docutils.SphinxDirective):
         api = app.wurfapi_api
         user_data = self._user_data()
         selector = self._selector()
-        user_path = app.config.wurfapi.get("user_templates", None)
-
-        if user_path:
-            # Make sure it is relative to the documentation directory
-            user_path = os.path.join(app.srcdir, user_path)
+        user_path = user_templates_path(app=app)
 
         if selector and selector not in api:
             raise wurfapi_error.WurfapiError(
-                'Selector "{}" not in API possible values are {}'.format(
-                    selector, api.keys()
+                'Selector "{}" not in API closest matches are {}'.format(
+                    selector, selector_index.suggest(selectors=api, selector=selector)
                 )
             )
 
-        template = template_render.TemplateRender(user_path=user_path)
+        # The templates are compiled once per build and reused by all the
+        # directives using the same user templates
+        template = app.wurfapi_templates.get(user_path)
 
-        data = template.render(
-            selector=selector,
-            api=api,
-            filename=self._template_file(),
-            user_data=user_data,
-        )
+        if template is None:
+            template = template_render.TemplateRender(
+                user_path=user_path,
+                cache_path=template_cache_path(app=app),
+            )
+            app.wurfapi_templates[user_path] = template
+
+        if app.wurfapi_render_cache is not None:
+            data, key = app.wurfapi_render_cache.render(
+                template=template,
+                selector=selector,
+                filename=self._template_file(),
+                user_data=user_data,
+            )
+
+            # Remember the entries used by each document, such that the
+            # entries of the documents Sphinx does not read again are kept
+            # when pruning the cache
+            render_keys(env=env).setdefault(env.docname, set()).add(key)
+        else:
+            data = template.render(
+                selector=selector,
+                api=api,
+                filename=self._template_file(),
+                user_data=user_data,
+            )
 
         # Dump the rst to a file - mostly for debugging purposes
         rst_file = self.slug() + ".rst"
@@ -290,16 +315,77 @@ def generate_doxygen(app):
     # Check if we should be recursive
     recursive = app.config.wurfapi["recursive"]
 
+    if "incremental" in parser_config:
+        incremental = parser_config["incremental"]
+    else:
+        incremental = False
+
+    if incremental:
+        # The incremental mode updates the XML from the previous build, so
+        # we keep it in the doctree directory rather than the temp location
+        doxygen_path = os.path.join(app.doctreedir, "wurfapi", "doxygen")
+
+        if not os.path.exists(doxygen_path):
+            os.makedirs(name=doxygen_path)
+    else:
+        doxygen_path = output_path
+
+    if "shards" in parser_config:
+        shards = parser_config["shards"]
+    else:
+        shards = 1
+
+    if "tagfiles" in parser_config:
+        tagfiles = parser_config["tagfiles"]
+    else:
+        tagfiles = []
+
+    # The tag file paths are relative to the conf.py
+    tagfile_paths = [os.path.join(app.srcdir, t["path"]) for t in tagfiles]
+
     generator = doxygen_generator.DoxygenGenerator(
         doxygen_executable=doxygen_executable,
         runner=run,
         recursive=recursive,
         source_paths=source_paths,
-        output_path=output_path,
+        output_path=doxygen_path,
         warnings_as_error=parser_config["warnings_as_error"],
+        incremental=incremental,
+        shards=shards,
+        tagfiles=tagfile_paths,
     )
 
-    output = generator.generate()
+    if "cache" in parser_config:
+        use_cache = parser_config["cache"]
+    else:
+        use_cache = True
+
+    if use_cache and not incremental:
+        # The XML is cached in the doctree directory, such that it survives
+        # between builds. If none of the inputs to Doxygen changed we can
+        # reuse the XML from the previous build. The incremental mode
+        # already keeps its XML in the doctree directory, so it is not
+        # cached a second time.
+        cache = doxygen_cache.DoxygenCache(
+            cache_path=os.path.join(app.doctreedir, "wurfapi", "doxygen_cache"),
+            log=logger,
+        )
+
+        cache_key = cache.key(
+            source_paths=source_paths,
+            recursive=recursive,
+            doxyfile=generator.doxyfile(),
+            doxygen_version=generator.version(),
+            version=VERSION,
+            tagfiles=tagfile_paths,
+        )
+
+        output = cache.lookup(key=cache_key)
+
+        if output is None:
+            output = cache.store(key=cache_key, xml_path=generator.generate())
+    else:
+        output = generator.generate()
 
     logger.info("wurfapi doxygen XML {}".format(output))
 
@@ -331,12 +417,39 @@ def generate_doxygen(app):
         project_root=project_root, include_paths=include_paths, log=logger
     )
 
+    if "workers" in parser_config:
+        workers = parser_config["workers"]
+    else:
+        workers = 1
+
+    if "streaming" in parser_config:
+        streaming = parser_config["streaming"]
+    else:
+        streaming = False
+
+    if use_cache:
+        # The parsed compounds are cached next to the Doxygen XML cache
+        cache = parser_cache.ParserCache(
+            cache_path=os.path.join(app.doctreedir, "wurfapi", "parser_cache"),
+            log=logger,
+        )
+    else:
+        cache = None
+
     parser = doxygen_parser.DoxygenParser(
-        doxygen_path=output, location_mapper=mapper, patch_api=patch_api, log=logger
+        doxygen_path=output,
+        location_mapper=mapper,
+        patch_api=patch_api,
+        log=logger,
+        workers=workers,
+        cache=cache,
+        streaming=streaming,
     )
 
     api = parser.parse_index()
 
+    mapper.log_cache_info()
+
     if "collapse_inline_namespaces" in parser_config:
         selectors = parser_config["collapse_inline_namespaces"]
     else:
@@ -346,13 +459,44 @@ def generate_doxygen(app):
         api=api, selectors=selectors
     )
 
+    if "link_inventories" in app.config.wurfapi:
+        inventories = app.config.wurfapi["link_inventories"]
+    else:
+        inventories = []
+
+    # The types found in the Doxygen tag files are linked in the same way
+    inventories = inventories + tagfiles
+
+    if inventories:
+        symbol_index = link_inventory.SymbolIndex()
+
+        for inventory in inventories:
+            # The inventory paths are relative to the conf.py
+            inventory_path = os.path.join(app.srcdir, inventory["path"])
+
+            if "url" in inventory:
+                url = inventory["url"]
+            else:
+                url = ""
+
+            if "labels" in inventory:
+                labels = inventory["labels"]
+            else:
+                labels = False
+
+            symbol_index.load(path=inventory_path, url=url, labels=labels)
+
+        logger.info("wurfapi loaded {} inventory symbols".format(len(symbol_index)))
+    else:
+        symbol_index = None
+
     # Instatiate the link provider
-    provider = link_provider.LinkProvider(user_mappings=[])
+    provider = link_provider.LinkProvider(user_mappings=[], symbol_index=symbol_index)
 
     # Try to find additonal links across the API - making it possible for the
     # user to jump more conveniently around in the docs
     mapper = link_mapper.LinkMapper(api=api, link_provider=provider)
-    api = mapper.map()
+    api = mapper.map(in_place=True)
 
     # Dump the API
     with open(os.path.join(app.doctreedir, "wurfapi_api.json"), "w") as f:
@@ -364,22 +508,158 @@ def generate_doxygen(app):
     # Store the final API
     app.wurfapi_api = api
 
+    # The template renderers used by the directives, see WurfapiDirective.run
+    app.wurfapi_templates = {}
+
+    if use_cache:
+        app.wurfapi_render_cache = render_cache.RenderCache(
+            cache_path=os.path.join(app.doctreedir, "wurfapi", "render_cache"),
+            api=api,
+            log=logger,
+        )
+    else:
+        app.wurfapi_render_cache = None
+
+    if "prerender_workers" in app.config.wurfapi:
+        prerender_workers = app.config.wurfapi["prerender_workers"]
+    else:
+        prerender_workers = 0
+
+    if prerender_workers:
+        if not use_cache:
+            raise wurfapi_error.WurfapiError(
+                "The prerender_workers option requires the cache to be enabled"
+            )
+
+        prerender_directives(app=app, workers=prerender_workers)
+
+
+def user_templates_path(app):
+    """Return the path to the user templates or None"""
+
+    user_path = app.config.wurfapi.get("user_templates", None)
+
+    if user_path:
+        # Make sure it is relative to the documentation directory
+        user_path = os.path.join(app.srcdir, user_path)
+
+    return user_path
+
+
+def template_cache_path(app):
+    """Return the path to the cache of the compiled templates"""
+    return os.path.join(app.doctreedir, "wurfapi", "template_cache")
+
+
+def prerender_directives(app, workers):
+    """Render the wurfapi directives of all documents into the render cache
+    using a pool of worker processes.
+
+    When Sphinx reads the documents the directives find the rendered rst in
+    the render cache.
+
+    :param app: The Sphinx application
+    :param workers: The number of worker processes
+    """
+
+    # Skip the same files as Sphinx does when looking for documents
+    matcher = sphinx.util.matching.Matcher(
+        app.config.exclude_patterns + app.config.templates_path
+    )
+
+    # The build directories may be inside the source directory
+    build_paths = [
+        os.path.relpath(path, app.srcdir) for path in [app.outdir, app.doctreedir]
+    ]
+
+    def exclude(path):
+        return path in build_paths or matcher(path)
+
+    directives = prerender.find_directives(
+        srcdir=app.srcdir, suffixes=list(app.config.source_suffix), exclude=exclude
+    )
+
+    counts = prerender.prerender(
+        directives=directives,
+        api=app.wurfapi_api,
+        user_path=user_templates_path(app=app),
+        cache_path=app.wurfapi_render_cache.cache_path,
+        template_cache_path=template_cache_path(app=app),
+        workers=workers,
+    )
+
+    logger.info(
+        "Pre-rendered %d directives using %d workers "
+        "(%d cached, %d rendered, %d failed)",
+        len(directives),
+        workers,
+        counts["hits"],
+        counts["misses"],
+        counts["failures"],
+    )
+
+
+def render_keys(env):
+    """Return the dict mapping a document name to the render cache keys
+    used by its directives. It is stored in the Sphinx environment, so it
+    survives between builds.
+    """
+    if not hasattr(env, "wurfapi_render_keys"):
+        env.wurfapi_render_keys = {}
+
+    return env.wurfapi_render_keys
+
+
+def purge_render_keys(app, env, docname):
+    """Forget the render cache keys of a document being read again or
+    removed"""
+    render_keys(env=env).pop(docname, None)
+
+
+def merge_render_keys(app, env, docnames, other):
+    """Collect the render cache keys of the documents read by a parallel
+    worker"""
+    other_keys = render_keys(env=other)
+
+    for docname in docnames:
+        if docname in other_keys:
+            render_keys(env=env)[docname] = other_keys[docname]
+
+
+def update_render_cache(app, env):
+    """Write the render cache hits and misses to the build log and remove
+    the entries no document uses"""
+
+    if app.wurfapi_render_cache is None:
+        return
+
+    app.wurfapi_render_cache.log_cache_info()
+
+    keys = set()
+    for docname_keys in render_keys(env=env).values():
+        keys |= docname_keys
+
+    app.wurfapi_render_cache.prune(keys=keys)
+
 
 class WurfapiRole:
     def __init__(self):
-        # We will piggyback on the XRefRole in sphinx. This XRefRole setup is called for 'ref'. See
-        # https://github.com/sphinx-doc/sphinx/blob/80b0a16e1c5f7266522a50284a003a0e17cf5ff7/sphinx/domains/std.py#L589
+        # We will piggyback on the XRefRole in sphinx. This XRefRole setup is
+        # called for 'ref'. See the "ref" role in sphinx/domains/std.py:
+        # https://github.com/sphinx-doc/sphinx/blob/80b0a16e1c5f7266522a50284a003a0e17cf5ff7/sphinx/domains/std.py#L589  # noqa: E501
         self.xref = sphinx.roles.XRefRole(
             lowercase=True, innernodeclass=docutils.nodes.inline, warn_dangling=True
         )
 
     def __call__(self, name, rawtext, text, lineno, inliner, options={}, content=[]):
         """
-        The call is passed into the Sphinx roles. From XRefRole to ReferenceRole to SphinxRole.
-        This ensures that Sphinx handles the .rst reference as if it was written as a full unique name
-        of an API element. This is ensured if enough information is given to be able to deduce and distinguish
-        the unique name from the text given.
-        All the function arguments are extracted from the .rst file where the role is called
+        The call is passed into the Sphinx roles. From XRefRole to
+        ReferenceRole to SphinxRole. This ensures that Sphinx handles the
+        .rst reference as if it was written as a full unique name of an API
+        element. This is ensured if enough information is given to be able
+        to deduce and distinguish the unique name from the text given.
+        All the function arguments are extracted from the .rst file where
+        the role is called
 
         :param name: The name of the role called e.g 'ref'
         :param rawtext: The full text with :role:`text`
@@ -471,6 +751,14 @@ def setup(app):
     # Map labels
     app.connect("doctree-read", map_wurfapi_named_target)
 
+    # Track the render cache entries used by each document
+    app.connect("env-purge-doc", purge_render_keys)
+    app.connect("env-merge-info", merge_render_keys)
+
+    # Log the render cache hits and misses and prune the cache when all
+    # documents are read
+    app.connect("env-updated", update_render_cache)
+
     # We use the doctreedir as build directory. The default for this
     # is inside _build/.doctree folder
     build_dir = os.path.join(app.doctreedir, "wurfapi")
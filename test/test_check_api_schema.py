@@ -1,4 +1,12 @@
+import os
+import re
+import copy
 import json
+
+import mock
+import pytest
+import schema
+
 import wurfapi.check_api_schema
 
 test_api = {
@@ -216,3 +224,66 @@ test_api = {
 def test_check_schema():
 
     wurfapi.check_api_schema.check_api_schema(api=test_api)
+
+
+def test_check_schema_error():
+
+    # The fast validator finds the invalid entries and the error message is
+    # the one from the schema library
+    for selector, key, value in [
+        ("class_dfdsfsd", "access", "friend"),
+        ("class_dfdsfsd", "members", ["missing"]),
+        ("using_tryrt", "type", [{"value": "uint32_t", "link": {"url": False}}]),
+        ("enum_dfsdd", "location", {"path": "some.h", "line": True}),
+        ("define_fsdfsddsfsdfs", "initializer", ""),
+        ("file_dfsd", "extra", "value"),
+    ]:
+        api = copy.deepcopy(test_api)
+        api[selector][key] = value
+
+        assert not wurfapi.check_api_schema.validate(api=api)
+
+        with pytest.raises(schema.SchemaError) as detailed:
+            wurfapi.check_api_schema.check_api_schema_detailed(api=api)
+
+        with pytest.raises(schema.SchemaError) as error:
+            wurfapi.check_api_schema.check_api_schema(api=api)
+
+        # The messages contain the addresses of the schema objects
+        def strip(message):
+            return re.sub(r" at 0x[0-9a-fA-F]+", "", message)
+
+        assert strip(str(error.value)) == strip(str(detailed.value))
+
+
+def test_check_schema_snapshot(testdirectory):
+
+    snapshot_path = os.path.join(testdirectory.path(), "snapshot.json")
+    api = copy.deepcopy(test_api)
+
+    wurfapi.check_api_schema.check_api_schema(api=api, snapshot_path=snapshot_path)
+    assert os.path.isfile(snapshot_path)
+
+    api["file_dfsd"]["path"] = "/bla/bla/other.exe"
+
+    with mock.patch(
+        "wurfapi.check_api_schema.validate",
+        wraps=wurfapi.check_api_schema.validate,
+    ) as validate:
+
+        # Only the changed entry is validated
+        wurfapi.check_api_schema.check_api_schema(api=api, snapshot_path=snapshot_path)
+        validate.assert_called_once_with(api=api, selectors=["file_dfsd"])
+
+        # Removing an entry validates all entries, since others may link
+        # to it
+        del api["namespace_dfsd"]
+        validate.reset_mock()
+
+        wurfapi.check_api_schema.check_api_schema(api=api, snapshot_path=snapshot_path)
+        validate.assert_called_once_with(api=api, selectors=api)
+
+    api["file_dfsd"]["path"] = ""
+
+    with pytest.raises(schema.SchemaError):
+        wurfapi.check_api_schema.check_api_schema(api=api, snapshot_path=snapshot_path)
@@ -43,3 +43,56 @@ def test_nested_a_namespace(datarecorder):
     datarecorder.record_data(
         data=api, recording_file="test/data/recordings/test_nested_a_namespace.json"
     )
+
+
+def test_nested_multiple_namespaces():
+
+    api = {
+        "A": {"scope": None, "kind": "namespace", "inline": False, "members": ["A::B"]},
+        "A::B": {
+            "scope": "A",
+            "kind": "namespace",
+            "inline": True,
+            "members": ["A::B::C", "A::B::bar"],
+        },
+        "A::B::C": {
+            "scope": "A::B",
+            "kind": "namespace",
+            "inline": True,
+            "members": ["A::B::C::foo"],
+        },
+        "A::B::bar": {"scope": "A::B", "kind": "class", "members": []},
+        "A::B::C::foo": {
+            "scope": "A::B::C",
+            "kind": "class",
+            "members": [],
+            "type": [{"value": "bar", "link": {"url": False, "value": "A::B::bar"}}],
+        },
+    }
+
+    api = wurfapi.collapse_inline_namespaces.collapse_inline_namespaces(
+        api, selectors=["A::B", "A::B::C"]
+    )
+
+    assert sorted(api) == ["A", "A::bar", "A::foo"]
+    assert api["A"]["members"] == ["A::bar", "A::foo"]
+    assert api["A::foo"]["scope"] == "A"
+    assert api["A::foo"]["type"][0]["link"]["value"] == "A::bar"
+
+
+def test_scope_rewriter():
+
+    rewriter = wurfapi.collapse_inline_namespaces.ScopeRewriter(
+        rewrites=[("A::B::C", "A::B"), ("A::B", "A"), ("X::", "")]
+    )
+
+    # The rewrites are applied in order, the same as calling update_scope
+    # once for each of them
+    for value in ["A::B::C::foo", "A::B::bar", "A::Bx", "X::A::B::C", "Y::A"]:
+        expected = {"v": value}
+        for from_scope, to_scope in rewriter.rewrites:
+            expected = wurfapi.collapse_inline_namespaces.update_scope(
+                api=expected, from_scope=from_scope, to_scope=to_scope
+            )
+
+        assert rewriter.rewrite(value=value) == expected["v"]
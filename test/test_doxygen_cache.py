@@ -0,0 +1,47 @@
+import mock
+import os
+
+import wurfapi
+import wurfapi.doxygen_cache
+
+
+def test_doxygen_cache(testdirectory):
+
+    coffee_dir = testdirectory.copy_dir("test/data/cpp_coffee")
+    xml_dir = testdirectory.mkdir("xml")
+    xml_dir.write_text(filename="index.xml", data="<doxygenindex/>", encoding="utf-8")
+
+    cache = wurfapi.doxygen_cache.DoxygenCache(
+        cache_path=os.path.join(testdirectory.path(), "cache"), log=mock.Mock()
+    )
+
+    def key():
+        return cache.key(
+            source_paths=[os.path.join(coffee_dir.path(), "src")],
+            recursive=True,
+            doxyfile="INPUT = src",
+            doxygen_version="1.8.12",
+            version="1.0.0",
+        )
+
+    first_key = key()
+    assert first_key == key()
+    assert cache.lookup(key=first_key) is None
+
+    cached_xml = cache.store(key=first_key, xml_path=xml_dir.path())
+    assert os.path.isfile(os.path.join(cached_xml, "index.xml"))
+    assert cache.lookup(key=first_key) == cached_xml
+
+    # Changing a source file should change the key
+    coffee_dir.join("src").join("coffee").write_text(
+        filename="coffee.h", data="// changed", encoding="utf-8"
+    )
+
+    second_key = key()
+    assert second_key != first_key
+    assert cache.lookup(key=second_key) is None
+
+    # Storing a new entry drops the old one
+    cache.store(key=second_key, xml_path=xml_dir.path())
+    assert cache.lookup(key=first_key) is None
+    assert cache.lookup(key=second_key) is not None
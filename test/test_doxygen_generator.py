@@ -1,9 +1,12 @@
 import mock
 import os
+import logging
 
 import wurfapi
 import wurfapi.doxygen_generator
 import wurfapi.doxygen_downloader
+import wurfapi.doxygen_parser
+import wurfapi.location_mapper
 import wurfapi.run
 
 
@@ -29,3 +32,167 @@ def test_doxygen_generator(testdirectory):
 
     index_xml = os.path.join(xml_output, "index.xml")
     assert os.path.isfile(index_xml)
+
+
+def test_doxygen_generator_incremental(testdirectory):
+
+    output_dir = testdirectory.mkdir("output")
+    coffee_dir = testdirectory.copy_dir("test/data/cpp_coffee")
+
+    doxygen_executable = wurfapi.doxygen_downloader.ensure_doxygen()
+
+    generator = wurfapi.doxygen_generator.DoxygenGenerator(
+        doxygen_executable=doxygen_executable,
+        runner=wurfapi.run,
+        recursive=True,
+        source_paths=[coffee_dir.path()],
+        output_path=output_dir.path(),
+        warnings_as_error=True,
+        incremental=True,
+    )
+
+    xml_output = generator.generate()
+
+    assert output_dir.contains_file("manifest.json")
+
+    # Add a new header and run again, only the new file should be passed
+    # to Doxygen
+    coffee_dir.write_text(
+        filename="tea.h",
+        data="namespace project\n{\n/// A cup of tea\nclass tea\n{\n};\n}\n",
+        encoding="utf-8",
+    )
+
+    assert generator.generate() == xml_output
+    assert os.path.isfile(os.path.join(xml_output, "classproject_1_1tea.xml"))
+
+    with open(os.path.join(output_dir.path(), "partial", "Doxyfile")) as doxyfile:
+        assert "tea.h" in doxyfile.read()
+
+
+def test_doxygen_generator_sharded(testdirectory):
+
+    coffee_dir = testdirectory.copy_dir("test/data/cpp_coffee")
+
+    doxygen_executable = wurfapi.doxygen_downloader.ensure_doxygen()
+
+    def parse(shards):
+        output_dir = testdirectory.mkdir("output-{}".format(shards))
+
+        generator = wurfapi.doxygen_generator.DoxygenGenerator(
+            doxygen_executable=doxygen_executable,
+            runner=wurfapi.run,
+            recursive=True,
+            source_paths=[coffee_dir.path()],
+            output_path=output_dir.path(),
+            warnings_as_error=True,
+            shards=shards,
+        )
+
+        xml_output = generator.generate()
+
+        log = logging.getLogger(name="test_doxygen_generator_sharded")
+
+        mapper = wurfapi.location_mapper.LocationMapper(
+            project_root=coffee_dir.path(), include_paths=[], log=log
+        )
+
+        parser = wurfapi.doxygen_parser.DoxygenParser(
+            doxygen_path=xml_output, location_mapper=mapper, patch_api=[], log=log
+        )
+
+        return output_dir, parser.parse_index()
+
+    _, api = parse(shards=1)
+    output_dir, sharded_api = parse(shards=3)
+
+    assert output_dir.contains_dir("shard-0")
+    assert output_dir.contains_dir("shard-1")
+
+    # Splitting the files between the Doxygen processes gives the same API
+    # as a single run
+    assert sharded_api == api
+
+
+def test_doxygen_generator_sharded_empty(testdirectory):
+
+    output_dir = testdirectory.mkdir("output")
+    empty_dir = testdirectory.mkdir("empty")
+
+    runner = mock.Mock()
+    runner.run.return_value.stderr.output = []
+
+    generator = wurfapi.doxygen_generator.DoxygenGenerator(
+        doxygen_executable="doxygen",
+        runner=runner,
+        recursive=True,
+        source_paths=[empty_dir.path()],
+        output_path=output_dir.path(),
+        warnings_as_error=True,
+        shards=2,
+    )
+
+    # Without any input files Doxygen runs once on the source paths
+    assert generator.generate() == os.path.join(output_dir.path(), "xml")
+
+    runner.run.assert_called_once_with(
+        command="doxygen Doxyfile", cwd=output_dir.path()
+    )
+    assert not output_dir.contains_dir("shard-0")
+
+
+def test_doxygen_generator_input_files(testdirectory):
+
+    output_dir = testdirectory.mkdir("output")
+    src_dir = testdirectory.mkdir("src")
+
+    for filename in ["coffee.h", "coffee.CPP", "mainpage.dox", "notes.txt"]:
+        src_dir.write_text(filename=filename, data="", encoding="utf-8")
+
+    generator = wurfapi.doxygen_generator.DoxygenGenerator(
+        doxygen_executable="doxygen",
+        runner=mock.Mock(),
+        recursive=True,
+        source_paths=[src_dir.path()],
+        output_path=output_dir.path(),
+        warnings_as_error=True,
+        incremental=True,
+    )
+
+    # The files hashed by the incremental runs are the files Doxygen reads
+    # using the FILE_PATTERNS we pass
+    assert [os.path.basename(f) for f in generator.input_files()] == [
+        "coffee.CPP",
+        "coffee.h",
+        "mainpage.dox",
+    ]
+
+    doxyfile = generator.doxyfile()
+
+    assert "FILE_PATTERNS    = *.c *.cc" in doxyfile
+    assert " *.dox " in doxyfile
+
+
+def test_doxygen_generator_tagfiles(testdirectory):
+
+    output_dir = testdirectory.mkdir("output")
+    coffee_dir = testdirectory.copy_dir("test/data/cpp_coffee")
+
+    testdirectory.write_text(
+        filename="kodo.tag", data="<tagfile></tagfile>", encoding="utf-8"
+    )
+    tagfile = os.path.join(testdirectory.path(), "kodo.tag")
+
+    generator = wurfapi.doxygen_generator.DoxygenGenerator(
+        doxygen_executable="doxygen",
+        runner=wurfapi.run,
+        recursive=True,
+        source_paths=[coffee_dir.path()],
+        output_path=output_dir.path(),
+        warnings_as_error=True,
+        tagfiles=[tagfile],
+    )
+
+    doxyfile = generator.doxyfile()
+
+    assert "TAGFILES = {}".format(tagfile) in doxyfile
@@ -0,0 +1,523 @@
+import os
+
+import lxml.etree
+
+import wurfapi
+import wurfapi.doxygen_merge
+
+INDEX = """<?xml version="1.0"?>
+<doxygenindex>
+{}
+</doxygenindex>
+"""
+
+NAMESPACE = """<?xml version="1.0"?>
+<doxygen>
+<compounddef id="namespaceproj" kind="namespace">
+<compoundname>proj</compoundname>
+{inner}
+<sectiondef kind="func">
+{members}
+</sectiondef>
+<briefdescription></briefdescription>
+<detaileddescription></detaileddescription>
+</compounddef>
+</doxygen>
+"""
+
+MEMBER = """<memberdef kind="function" id="{id}" prot="public">
+<type>{type}</type>
+<name>{name}</name>
+<location file="{file}" line="1"/>
+</memberdef>"""
+
+CLASS = """<?xml version="1.0"?>
+<doxygen>
+<compounddef id="{id}" kind="class" prot="public">
+<compoundname>{name}</compoundname>
+<location file="{file}" line="1"/>
+</compounddef>
+</doxygen>
+"""
+
+CLASS_MEMBERS = """<?xml version="1.0"?>
+<doxygen>
+<compounddef id="{id}" kind="class" prot="public">
+<compoundname>{name}</compoundname>
+<sectiondef kind="public-func">
+{members}
+</sectiondef>
+<location file="{file}" line="1"/>
+</compounddef>
+</doxygen>
+"""
+
+CLASS_DOCUMENTED = """<?xml version="1.0"?>
+<doxygen>
+<compounddef id="{id}" kind="class" prot="public">
+<compoundname>{name}</compoundname>
+<briefdescription></briefdescription>
+<detaileddescription><para>{para}</para></detaileddescription>
+<location file="{file}" line="1"/>
+</compounddef>
+</doxygen>
+"""
+
+DIR = """<?xml version="1.0"?>
+<doxygen>
+<compounddef id="dir_1" kind="dir">
+<compoundname>src</compoundname>
+{inner}
+<location file="{file}/"/>
+</compounddef>
+</doxygen>
+"""
+
+
+def write_xml(directory, compounds, index=None):
+    entries = ""
+    for refid, (kind, content) in compounds.items():
+        directory.write_text(filename=refid + ".xml", data=content, encoding="utf-8")
+        entries += '<compound refid="{}" kind="{}"><name/></compound>\n'.format(
+            refid, kind
+        )
+
+    # The index entries may be given to include the names of the compounds
+    # and members
+    if index is None:
+        index = entries
+
+    directory.write_text(
+        filename="index.xml", data=INDEX.format(index), encoding="utf-8"
+    )
+
+    return wurfapi.doxygen_merge.DoxygenXml(xml_path=directory.path())
+
+
+def test_doxygen_merge(testdirectory):
+
+    a_h = os.path.join(testdirectory.path(), "a.h")
+    b_h = os.path.join(testdirectory.path(), "b.h")
+
+    # The existing XML where a.h defines class alpha and the function
+    # make_beta() returns beta which is defined in b.h
+    into = write_xml(
+        directory=testdirectory.mkdir("into"),
+        compounds={
+            "namespaceproj": (
+                "namespace",
+                NAMESPACE.format(
+                    inner='<innerclass refid="classproj_1_1alpha">'
+                    "proj::alpha</innerclass>"
+                    '<innerclass refid="classproj_1_1beta">proj::beta</innerclass>',
+                    members=MEMBER.format(
+                        id="namespaceproj_1a1",
+                        type='<ref refid="classproj_1_1beta">beta</ref>',
+                        name="make_beta",
+                        file=a_h,
+                    )
+                    + MEMBER.format(
+                        id="namespaceproj_1a2", type="void", name="helper", file=b_h
+                    ),
+                ),
+            ),
+            "classproj_1_1alpha": (
+                "class",
+                CLASS.format(id="classproj_1_1alpha", name="proj::alpha", file=a_h),
+            ),
+            "classproj_1_1beta": (
+                "class",
+                CLASS.format(id="classproj_1_1beta", name="proj::beta", file=b_h),
+            ),
+        },
+    )
+
+    # Rerunning b.h where beta has been renamed to gamma
+    other = write_xml(
+        directory=testdirectory.mkdir("other"),
+        compounds={
+            "namespaceproj": (
+                "namespace",
+                NAMESPACE.format(
+                    inner='<innerclass refid="classproj_1_1gamma">'
+                    "proj::gamma</innerclass>",
+                    members=MEMBER.format(
+                        id="namespaceproj_1a3", type="void", name="other", file=b_h
+                    ),
+                ),
+            ),
+            "classproj_1_1gamma": (
+                "class",
+                CLASS.format(id="classproj_1_1gamma", name="proj::gamma", file=b_h),
+            ),
+        },
+    )
+
+    merged = wurfapi.doxygen_merge.merge(
+        into=into,
+        other=other,
+        remove_compounds=["classproj_1_1beta"],
+        remove_files=[b_h],
+    )
+
+    assert sorted(merged) == ["classproj_1_1gamma", "namespaceproj"]
+
+    result = wurfapi.doxygen_merge.DoxygenXml(xml_path=into.xml_path)
+
+    assert sorted(result.compounds()) == [
+        "classproj_1_1alpha",
+        "classproj_1_1gamma",
+        "namespaceproj",
+    ]
+
+    namespace = result.load("namespaceproj").find("compounddef")
+
+    assert [e.attrib["refid"] for e in namespace.findall("innerclass")] == [
+        "classproj_1_1alpha",
+        "classproj_1_1gamma",
+    ]
+
+    assert [m.findtext("name") for m in namespace.iter("memberdef")] == [
+        "make_beta",
+        "other",
+    ]
+
+    # The reference to the removed beta class is now plain text
+    memberdef = namespace.find(".//memberdef[@id='namespaceproj_1a1']")
+    assert memberdef.find("type/ref") is None
+    assert memberdef.findtext("type") == "beta"
+
+
+def test_doxygen_merge_incremental(testdirectory):
+    def path(filename):
+        return wurfapi.doxygen_merge.normalize_path(
+            os.path.join(testdirectory.path(), filename)
+        )
+
+    a_h, b_h, b_cpp = path("a.h"), path("b.h"), path("b.cpp")
+
+    # The class beta is declared in b.h with its function defined in b.cpp,
+    # where the namespace function helper is also defined
+    beta = (
+        "class",
+        CLASS_MEMBERS.format(
+            id="classproj_1_1beta",
+            name="proj::beta",
+            file=b_h,
+            members=MEMBER.format(
+                id="classproj_1_1beta_1a1", type="void", name="brew", file=b_cpp
+            ),
+        ),
+    )
+
+    into = write_xml(
+        directory=testdirectory.mkdir("into"),
+        compounds={
+            "namespaceproj": (
+                "namespace",
+                NAMESPACE.format(
+                    inner='<innerclass refid="classproj_1_1alpha">'
+                    "proj::alpha</innerclass>"
+                    '<innerclass refid="classproj_1_1beta">proj::beta</innerclass>',
+                    members=MEMBER.format(
+                        id="namespaceproj_1a1",
+                        type='<ref refid="classproj_1_1beta">beta</ref>',
+                        name="make_beta",
+                        file=a_h,
+                    )
+                    + MEMBER.format(
+                        id="namespaceproj_1a2", type="void", name="helper", file=b_cpp
+                    ),
+                ),
+            ),
+            "classproj_1_1alpha": (
+                "class",
+                CLASS.format(id="classproj_1_1alpha", name="proj::alpha", file=a_h),
+            ),
+            "classproj_1_1beta": beta,
+        },
+    )
+
+    compounds = wurfapi.doxygen_merge.dependencies(xml=into)
+
+    assert compounds == {
+        "namespaceproj_1a1": [a_h],
+        "namespaceproj_1a2": [b_cpp],
+        "classproj_1_1alpha": [a_h],
+        "classproj_1_1beta": sorted([b_h, b_cpp]),
+    }
+
+    # Changing b.h requires b.cpp as well, which also regenerates helper
+    remove, files = wurfapi.doxygen_merge.stale_compounds(
+        compounds=compounds, files={b_h}
+    )
+
+    assert remove == {"classproj_1_1beta", "namespaceproj_1a2"}
+    assert files == {b_h, b_cpp}
+
+    # The Doxygen run on b.h and b.cpp
+    other = write_xml(
+        directory=testdirectory.mkdir("other"),
+        compounds={
+            "namespaceproj": (
+                "namespace",
+                NAMESPACE.format(
+                    inner='<innerclass refid="classproj_1_1beta">'
+                    "proj::beta</innerclass>",
+                    members=MEMBER.format(
+                        id="namespaceproj_1a2", type="void", name="helper", file=b_cpp
+                    ),
+                ),
+            ),
+            "classproj_1_1beta": beta,
+        },
+    )
+
+    merged = wurfapi.doxygen_merge.merge(
+        into=into, other=other, remove_compounds=remove, remove_files=files
+    )
+
+    assert sorted(merged) == ["classproj_1_1beta", "namespaceproj"]
+
+    result = wurfapi.doxygen_merge.DoxygenXml(xml_path=into.xml_path)
+
+    assert sorted(result.compounds()) == [
+        "classproj_1_1alpha",
+        "classproj_1_1beta",
+        "namespaceproj",
+    ]
+
+    namespace = result.load("namespaceproj").find("compounddef")
+
+    assert [e.attrib["refid"] for e in namespace.findall("innerclass")] == [
+        "classproj_1_1alpha",
+        "classproj_1_1beta",
+    ]
+
+    # Each member is found once, and the reference to beta is kept since
+    # beta was regenerated
+    assert [m.findtext("name") for m in namespace.iter("memberdef")] == [
+        "make_beta",
+        "helper",
+    ]
+
+    memberdef = namespace.find(".//memberdef[@id='namespaceproj_1a1']")
+    assert memberdef.find("type/ref").attrib["refid"] == "classproj_1_1beta"
+
+    # The manifest is updated from the merged compounds
+    assert wurfapi.doxygen_merge.dependencies(xml=result, refids=merged) == {
+        "namespaceproj_1a1": [a_h],
+        "namespaceproj_1a2": [b_cpp],
+        "classproj_1_1beta": sorted([b_h, b_cpp]),
+    }
+
+
+def test_doxygen_merge_rename(testdirectory):
+
+    a_h = os.path.join(testdirectory.path(), "a", "file.h")
+    b_h = os.path.join(testdirectory.path(), "b", "file.h")
+
+    into = write_xml(
+        directory=testdirectory.mkdir("into"),
+        compounds={
+            "file_8h": ("file", CLASS.format(id="file_8h", name="file.h", file=a_h))
+        },
+    )
+
+    # A different file which Doxygen gave the same refid in another run
+    other = write_xml(
+        directory=testdirectory.mkdir("other"),
+        compounds={
+            "file_8h": ("file", CLASS.format(id="file_8h", name="file.h", file=b_h))
+        },
+    )
+
+    merged = wurfapi.doxygen_merge.merge(into=into, other=other)
+
+    assert merged == ["file_8h_m"]
+
+    result = wurfapi.doxygen_merge.DoxygenXml(xml_path=into.xml_path)
+    assert sorted(result.compounds()) == ["file_8h", "file_8h_m"]
+
+    compounddef = result.load("file_8h_m").find("compounddef")
+    assert compounddef.attrib["id"] == "file_8h_m"
+
+
+def test_doxygen_merge_shards(testdirectory):
+
+    a_h = os.path.join(testdirectory.path(), "a.h")
+    b_h = os.path.join(testdirectory.path(), "b.h")
+
+    # Two shards each seeing part of the proj namespace. The first shard
+    # refers to a member which is not documented anywhere.
+    first = write_xml(
+        directory=testdirectory.mkdir("first"),
+        compounds={
+            "namespaceproj": (
+                "namespace",
+                NAMESPACE.format(
+                    inner='<innerclass refid="classproj_1_1alpha">'
+                    "proj::alpha</innerclass>",
+                    members=MEMBER.format(
+                        id="namespaceproj_1a1",
+                        type='<ref refid="namespaceproj_1a9">missing</ref>',
+                        name="make_alpha",
+                        file=a_h,
+                    ),
+                ),
+            ),
+            "classproj_1_1alpha": (
+                "class",
+                CLASS.format(id="classproj_1_1alpha", name="proj::alpha", file=a_h),
+            ),
+        },
+    )
+
+    second = write_xml(
+        directory=testdirectory.mkdir("second"),
+        compounds={
+            "namespaceproj": (
+                "namespace",
+                NAMESPACE.format(
+                    inner='<innerclass refid="classproj_1_1beta">'
+                    "proj::beta</innerclass>",
+                    members=MEMBER.format(
+                        id="namespaceproj_1a2", type="void", name="helper", file=b_h
+                    ),
+                ),
+            ),
+            "classproj_1_1beta": (
+                "class",
+                CLASS.format(id="classproj_1_1beta", name="proj::beta", file=b_h),
+            ),
+        },
+    )
+
+    xml = wurfapi.doxygen_merge.DoxygenXml(
+        xml_path=os.path.join(testdirectory.path(), "xml")
+    )
+
+    wurfapi.doxygen_merge.merge(into=xml, other=first)
+    wurfapi.doxygen_merge.merge(into=xml, other=second)
+
+    assert wurfapi.doxygen_merge.reconcile(xml=xml) == {"namespaceproj_1a9"}
+
+    result = wurfapi.doxygen_merge.DoxygenXml(xml_path=xml.xml_path)
+
+    assert sorted(result.compounds()) == [
+        "classproj_1_1alpha",
+        "classproj_1_1beta",
+        "namespaceproj",
+    ]
+
+    namespace = result.load("namespaceproj").find("compounddef")
+
+    assert [e.attrib["refid"] for e in namespace.findall("innerclass")] == [
+        "classproj_1_1alpha",
+        "classproj_1_1beta",
+    ]
+
+    assert [m.findtext("name") for m in namespace.iter("memberdef")] == [
+        "make_alpha",
+        "helper",
+    ]
+
+    memberdef = namespace.find(".//memberdef[@id='namespaceproj_1a1']")
+    assert memberdef.find("type/ref") is None
+    assert memberdef.findtext("type") == "missing"
+
+
+def test_doxygen_merge_dirs(testdirectory):
+
+    src = os.path.join(testdirectory.path(), "src")
+
+    def shard(name, filename):
+        return write_xml(
+            directory=testdirectory.mkdir(name),
+            compounds={
+                "dir_1": (
+                    "dir",
+                    DIR.format(
+                        inner='<innerfile refid="{0}_8h">{0}.h</innerfile>'.format(
+                            filename
+                        ),
+                        file=src,
+                    ),
+                )
+            },
+        )
+
+    xml = wurfapi.doxygen_merge.DoxygenXml(
+        xml_path=os.path.join(testdirectory.path(), "xml")
+    )
+
+    wurfapi.doxygen_merge.merge(into=xml, other=shard(name="first", filename="a"))
+    wurfapi.doxygen_merge.merge(into=xml, other=shard(name="second", filename="b"))
+
+    compounddef = xml.load("dir_1").find("compounddef")
+
+    assert [e.text for e in compounddef.findall("innerfile")] == ["a.h", "b.h"]
+
+
+def test_doxygen_merge_relink(testdirectory):
+
+    a_h = os.path.join(testdirectory.path(), "a.h")
+
+    # The first shard documents proj::Alpha which mentions proj::Beta and
+    # proj::make() from the second shard
+    first = write_xml(
+        directory=testdirectory.mkdir("first"),
+        compounds={
+            "namespaceproj": (
+                "namespace",
+                NAMESPACE.format(
+                    inner='<innerclass refid="classproj_1_1Alpha">'
+                    "proj::Alpha</innerclass>",
+                    members="",
+                ),
+            ),
+            "classproj_1_1Alpha": (
+                "class",
+                CLASS_DOCUMENTED.format(
+                    id="classproj_1_1Alpha",
+                    name="proj::Alpha",
+                    file=a_h,
+                    para="Made by <bold>Beta</bold> using make() as proj::Alpha"
+                    " but not beta or std::vector",
+                ),
+            ),
+        },
+        index='<compound refid="namespaceproj" kind="namespace"><name>proj</name>'
+        "</compound>"
+        '<compound refid="classproj_1_1Alpha" kind="class">'
+        "<name>proj::Alpha</name></compound>",
+    )
+
+    second = write_xml(
+        directory=testdirectory.mkdir("second"),
+        compounds={},
+        index='<compound refid="namespaceproj" kind="namespace"><name>proj</name>'
+        '<member refid="namespaceproj_1a1" kind="function"><name>make</name>'
+        "</member></compound>"
+        '<compound refid="classproj_1_1Beta" kind="class">'
+        "<name>proj::Beta</name></compound>"
+        '<compound refid="classproj_1_1beta" kind="class">'
+        "<name>proj::beta</name></compound>",
+    )
+
+    names = wurfapi.doxygen_merge.link_names(xml=first)
+    names.update(wurfapi.doxygen_merge.link_names(xml=second))
+
+    assert names["proj::make"] == ("namespaceproj_1a1", "member")
+    assert names["proj::Beta"] == ("classproj_1_1Beta", "compound")
+
+    assert wurfapi.doxygen_merge.relink(xml=first, names=names) == 2
+
+    para = first.load("classproj_1_1Alpha").find(".//detaileddescription/para")
+
+    assert lxml.etree.tostring(para, encoding="unicode") == (
+        '<para>Made by <bold><ref refid="classproj_1_1Beta" kindref="compound">'
+        "Beta</ref></bold> using "
+        '<ref refid="namespaceproj_1a1" kindref="member">make()</ref>'
+        " as proj::Alpha but not beta or std::vector</para>"
+    )
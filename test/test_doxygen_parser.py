@@ -2,12 +2,15 @@ import pyquery
 import os
 import pprint
 import mock
+import pytest
 import logging
+import lxml.etree
 
 import wurfapi
 import wurfapi.doxygen_parser
 import wurfapi.doxygen_generator
 import wurfapi.doxygen_downloader
+import wurfapi.location_mapper
 import wurfapi.run
 
 
@@ -246,6 +249,257 @@ def test_parser_input_templates(testdirectory, caplog, datarecorder):
     )
 
 
+def test_coffee_workers(testdirectory, caplog, datarecorder):
+
+    caplog.set_level(logging.DEBUG)
+
+    coffee_dir, src_dirs, xml_dir = generate_coffee_xml(testdirectory)
+    log = logging.getLogger(name="test_coffee_workers")
+
+    mapper = wurfapi.location_mapper.LocationMapper(
+        project_root=coffee_dir, include_paths=[], log=log
+    )
+
+    parser = wurfapi.doxygen_parser.DoxygenParser(
+        doxygen_path=xml_dir,
+        location_mapper=mapper,
+        patch_api=[
+            {
+                "selector": "project::v1_0_0::coffee::machine::impl",
+                "key": "access",
+                "value": "private",
+            }
+        ],
+        log=log,
+        workers=2,
+    )
+
+    api_data = parser.parse_index()
+
+    # The result must be the same as when parsing in a single process
+    datarecorder.record_data(
+        data=api_data,
+        recording_file="test/data/parser_recordings/coffee.json",
+    )
+
+
+def test_parser_find_parser():
+
+    parser = wurfapi.doxygen_parser.DoxygenParser(
+        doxygen_path=None, location_mapper=None, patch_api=[], log=mock.Mock()
+    )
+
+    # The dispatch index must select the same parser function as the linear
+    # scan over all the registered parser functions
+    for tag, attrib in [
+        ("compounddef", {"kind": "class"}),
+        ("compounddef", {"kind": "unknown"}),
+        ("compounddef", {}),
+        ("memberdef", {"kind": "function", "id": "some_id"}),
+        ("para", {}),
+    ]:
+        xml = lxml.etree.Element(tag, **attrib)
+
+        assert parser.supports(xml=xml)
+        assert parser._find_parser(xml=xml) is parser._find_in_list(xml=xml)
+
+    assert not parser.supports(xml=lxml.etree.Element("unknown"))
+
+
+def test_parser_compile_dispatch():
+    def function():
+        pass
+
+    # Registered without attributes, once as None and once as {}
+    parsers = [
+        wurfapi.doxygen_parser.ParserFunction(
+            function=function, tag="para", attrib=None
+        ),
+        wurfapi.doxygen_parser.ParserFunction(function=function, tag="para", attrib={}),
+    ]
+
+    with pytest.raises(RuntimeError):
+        wurfapi.doxygen_parser.DoxygenParser._compile_dispatch(parsers)
+
+
+def test_parser_cache_configuration(testdirectory):
+
+    log = logging.getLogger(name="test_parser_cache_configuration")
+
+    mapper = wurfapi.location_mapper.LocationMapper(
+        project_root=testdirectory.path(), include_paths=[], log=log
+    )
+
+    parser = wurfapi.doxygen_parser.DoxygenParser(
+        doxygen_path=None, location_mapper=mapper, patch_api=[], log=log
+    )
+
+    configuration = parser._cache_configuration()
+    assert parser._cache_configuration() == configuration
+
+    # A change to the location mapper changes the parsed API as much as a
+    # change to the parser itself
+    testdirectory.write_text(
+        filename="location_mapper.py", data="# changed", encoding="utf-8"
+    )
+    changed = os.path.join(testdirectory.path(), "location_mapper.py")
+
+    with mock.patch.object(wurfapi.location_mapper, "__file__", changed):
+        assert parser._cache_configuration() != configuration
+
+
+def test_parser_resolve_references(testdirectory):
+
+    xml_dir = testdirectory.mkdir("xml")
+    xml_dir.write_text(
+        filename="index.xml",
+        data='<doxygenindex><compound refid="namespaceproj" kind="namespace"/>'
+        '<compound refid="classproj_1_1alpha" kind="class"/></doxygenindex>',
+        encoding="utf-8",
+    )
+    xml_dir.write_text(
+        filename="namespaceproj.xml",
+        data='<doxygen><compounddef id="namespaceproj" kind="namespace">'
+        "<compoundname>proj</compoundname>"
+        '<innerclass refid="classproj_1_1alpha">proj::alpha</innerclass>'
+        "<briefdescription><para>See <ref refid='classproj_1_1alpha'>alpha"
+        "</ref><bold>classproj_1_1alpha</bold> uses <ref refid='classkodo' "
+        "external='/deps/kodo.tag'>kodo::encoder</ref></para></briefdescription>"
+        "<detaileddescription/></compounddef></doxygen>",
+        encoding="utf-8",
+    )
+    xml_dir.write_text(
+        filename="classproj_1_1alpha.xml",
+        data='<doxygen><compounddef id="classproj_1_1alpha" kind="class" '
+        'prot="public"><compoundname>proj::alpha</compoundname>'
+        "<briefdescription/><detaileddescription/>"
+        '<location file="{}" line="1"/></compounddef></doxygen>'.format(
+            os.path.join(testdirectory.path(), "alpha.h")
+        ),
+        encoding="utf-8",
+    )
+
+    log = logging.getLogger(name="test_parser_resolve_references")
+
+    mapper = wurfapi.location_mapper.LocationMapper(
+        project_root=testdirectory.path(), include_paths=[], log=log
+    )
+
+    parser = wurfapi.doxygen_parser.DoxygenParser(
+        doxygen_path=xml_dir.path(), location_mapper=mapper, patch_api=[], log=log
+    )
+
+    api = parser.parse_index()
+
+    assert api["proj"]["members"] == ["proj::alpha"]
+
+    paragraph = api["proj"]["briefdescription"][0]
+    assert paragraph[1]["link"] == {"url": False, "value": "proj::alpha"}
+
+    # Text which happens to look like a Doxygen id is left alone
+    assert paragraph[2] == {"kind": "bold", "content": "classproj_1_1alpha"}
+
+    # References to Doxygen tag files are not part of the API
+    assert paragraph[4] == {"kind": "text", "content": "kodo::encoder"}
+
+
+STREAMING_NAMESPACE = """<doxygen><compounddef id="namespaceproj" kind="namespace">
+<compoundname>proj</compoundname>
+<innerclass refid="classproj_1_1alpha">proj::alpha</innerclass>
+<sectiondef kind="func">
+<memberdef kind="function" id="namespaceproj_1a1" prot="public" static="no"
+ const="no" explicit="no" inline="no" virt="non-virtual">
+<type><ref refid="classproj_1_1alpha">alpha</ref></type>
+<name>make_alpha</name>
+<argsstring>(int size)</argsstring>
+<param><type>int</type><declname>size</declname></param>
+<briefdescription><para>Make an <ref refid="classproj_1_1alpha">alpha</ref>
+</para></briefdescription>
+<detaileddescription><para><parameterlist kind="param"><parameteritem>
+<parameternamelist><parametername>size</parametername></parameternamelist>
+<parameterdescription><para>The size</para></parameterdescription>
+</parameteritem></parameterlist></para></detaileddescription>
+<location file="{header}" line="3"/>
+</memberdef>
+</sectiondef>
+<briefdescription/><detaileddescription/>
+</compounddef></doxygen>"""
+
+STREAMING_FILE = """<doxygen><compounddef id="alpha_8h" kind="file">
+<compoundname>alpha.h</compoundname>
+<sectiondef kind="var">
+<memberdef kind="variable" id="alpha_8h_1a1" prot="public" static="no"
+ mutable="no">
+<type>int</type><name>outside</name>
+<location file="/outside/project.h" line="1"/>
+</memberdef>
+</sectiondef>
+<location file="{header}"/>
+</compounddef></doxygen>"""
+
+
+def test_parser_streaming(testdirectory):
+
+    header = os.path.join(testdirectory.path(), "alpha.h")
+
+    xml_dir = testdirectory.mkdir("xml")
+    xml_dir.write_text(
+        filename="index.xml",
+        data='<doxygenindex><compound refid="namespaceproj" kind="namespace"/>'
+        '<compound refid="classproj_1_1alpha" kind="class"/>'
+        '<compound refid="alpha_8h" kind="file"/></doxygenindex>',
+        encoding="utf-8",
+    )
+    xml_dir.write_text(
+        filename="classproj_1_1alpha.xml",
+        data='<doxygen><compounddef id="classproj_1_1alpha" kind="class" '
+        'prot="public"><compoundname>proj::alpha</compoundname>'
+        "<briefdescription/><detaileddescription/>"
+        '<location file="{}" line="1"/></compounddef></doxygen>'.format(header),
+        encoding="utf-8",
+    )
+    xml_dir.write_text(
+        filename="namespaceproj.xml",
+        data=STREAMING_NAMESPACE.format(header=header),
+        encoding="utf-8",
+    )
+    xml_dir.write_text(
+        filename="alpha_8h.xml",
+        data=STREAMING_FILE.format(header=header),
+        encoding="utf-8",
+    )
+
+    log = logging.getLogger(name="test_parser_streaming")
+
+    def parse(streaming):
+        mapper = wurfapi.location_mapper.LocationMapper(
+            project_root=testdirectory.path(), include_paths=[], log=log
+        )
+
+        parser = wurfapi.doxygen_parser.DoxygenParser(
+            doxygen_path=xml_dir.path(),
+            location_mapper=mapper,
+            patch_api=[],
+            log=log,
+            streaming=streaming,
+        )
+
+        return parser.parse_index()
+
+    api = parse(streaming=True)
+
+    # The variable outside the project root is not parsed by the file parser,
+    # so the error raised when it is parsed while streaming is not used
+    assert api == parse(streaming=False)
+    assert list(api) == list(parse(streaming=False))
+
+    function = api["proj::make_alpha(intsize)"]
+    assert function["return"]["type"][0]["link"]["value"] == "proj::alpha"
+    assert function["parameters"][0]["description"] == [
+        [{"kind": "text", "content": "The size"}]
+    ]
+
+
 def test_parser_replace_with():
 
     data_in = {"a": {"b": "replace", "c": ["replace", {"a": "replace"}]}}
@@ -0,0 +1,182 @@
+import os
+import zlib
+
+import pytest
+
+import wurfapi.link_inventory
+import wurfapi.link_provider
+import wurfapi.wurfapi_error
+
+OBJECTS_INV_HEADER = b"""# Sphinx inventory version 2
+# Project: kodo
+# Version: 1.0
+# The remainder of this file is compressed using zlib.
+"""
+
+OBJECTS_INV = """kodo::block::encoder cpp:class 1 api.html#$ -
+kodo::block::encoder::encode cpp:function 1 api.html#encode -
+kodo::block::decoder std:label -1 decoder.html#kodo-block-decoder kodo::block::decoder
+index std:doc -1 index.html Kodo
+"""
+
+TAGFILE = """<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
+<tagfile>
+  <compound kind="file">
+    <name>encoder.hpp</name>
+    <filename>encoder_8hpp.html</filename>
+    <member kind="function">
+      <name>make_encoder</name>
+      <anchorfile>encoder_8hpp.html</anchorfile>
+      <anchor>a2</anchor>
+    </member>
+  </compound>
+  <compound kind="class">
+    <name>kodo::encoder</name>
+    <filename>classkodo_1_1encoder</filename>
+    <member kind="function">
+      <name>encode</name>
+      <anchorfile>classkodo_1_1encoder</anchorfile>
+      <anchor>a1</anchor>
+    </member>
+  </compound>
+</tagfile>
+"""
+
+SYMBOL_LIST = """# Symbols in fifi
+fifi::field classfifi_1_1field.html
+fifi::field::operator bool\tclassfifi_1_1field.html#a1
+fifi::binary https://other.org/binary.html
+"""
+
+
+def test_sphinx_inventory(testdirectory):
+
+    testdirectory.write_binary(
+        filename="objects.inv",
+        data=OBJECTS_INV_HEADER + zlib.compress(OBJECTS_INV.encode("utf-8")),
+    )
+
+    index = wurfapi.link_inventory.SymbolIndex()
+    index.load(
+        path=os.path.join(testdirectory.path(), "objects.inv"),
+        url="https://kodo.org/docs/",
+    )
+
+    # The std:doc entry is not used, and the labels are only used if asked
+    assert len(index) == 2
+
+    assert index.find_link(typename="kodo::block::encoder") == {
+        "url": True,
+        "value": "https://kodo.org/docs/api.html#kodo::block::encoder",
+    }
+
+    assert index.find_link(typename="kodo::block::encoder::encode") == {
+        "url": True,
+        "value": "https://kodo.org/docs/api.html#encode",
+    }
+
+    assert index.find_link(typename="kodo::block::decoder") is None
+    assert index.find_link(typename="index") is None
+
+
+def test_sphinx_inventory_labels(testdirectory):
+
+    testdirectory.write_binary(
+        filename="objects.inv",
+        data=OBJECTS_INV_HEADER + zlib.compress(OBJECTS_INV.encode("utf-8")),
+    )
+
+    index = wurfapi.link_inventory.SymbolIndex()
+    index.load(
+        path=os.path.join(testdirectory.path(), "objects.inv"),
+        url="https://kodo.org/docs/",
+        labels=True,
+    )
+
+    assert len(index) == 3
+
+    # Sphinx labels are stored in lower case
+    assert index.find_link(typename="kodo::block::Decoder") == {
+        "url": True,
+        "value": "https://kodo.org/docs/decoder.html#kodo-block-decoder",
+    }
+
+
+def test_doxygen_tagfile(testdirectory):
+
+    testdirectory.write_text(filename="kodo.tag", data=TAGFILE, encoding="utf-8")
+
+    index = wurfapi.link_inventory.SymbolIndex()
+    index.load(
+        path=os.path.join(testdirectory.path(), "kodo.tag"), url="https://kodo.org"
+    )
+
+    # The members of the file are not scoped, so they are not used
+    assert len(index) == 2
+
+    assert index.find_link(typename="kodo::encoder") == {
+        "url": True,
+        "value": "https://kodo.org/classkodo_1_1encoder.html",
+    }
+
+    assert index.find_link(typename="kodo::encoder::encode") == {
+        "url": True,
+        "value": "https://kodo.org/classkodo_1_1encoder.html#a1",
+    }
+
+
+def test_symbol_list(testdirectory):
+
+    testdirectory.write_text(filename="fifi.txt", data=SYMBOL_LIST, encoding="utf-8")
+
+    index = wurfapi.link_inventory.SymbolIndex()
+    index.load(path=os.path.join(testdirectory.path(), "fifi.txt"), url="fifi")
+
+    assert len(index) == 3
+
+    assert index.find_link(typename="fifi::field::operator bool") == {
+        "url": True,
+        "value": "fifi/classfifi_1_1field.html#a1",
+    }
+
+    assert index.find_link(typename="fifi::binary") == {
+        "url": True,
+        "value": "https://other.org/binary.html",
+    }
+
+    testdirectory.write_text(filename="bad.txt", data="fifi::field", encoding="utf-8")
+
+    with pytest.raises(wurfapi.wurfapi_error.WurfapiError):
+        index.load(path=os.path.join(testdirectory.path(), "bad.txt"), url="")
+
+
+def test_link_provider_symbol_index():
+
+    index = wurfapi.link_inventory.SymbolIndex()
+    index.add(name="std::vector", url="https://local.org/vector.html")
+    index.add(name="fifi::field", url="https://fifi.org/field.html")
+
+    user_mappings = [
+        {"pattern": "fifi::.*", "link": {"url": True, "value": "https://user.org"}}
+    ]
+
+    provider = wurfapi.link_provider.LinkProvider(
+        user_mappings=user_mappings, symbol_index=index
+    )
+
+    # The user mappings are used before the symbol index
+    assert provider.find_link(typename="fifi::field") == {
+        "url": True,
+        "value": "https://user.org",
+    }
+
+    # The symbol index is used before the default mappings
+    assert provider.find_link(typename="std::vector") == {
+        "url": True,
+        "value": "https://local.org/vector.html",
+    }
+
+    assert provider.find_link(typename="std::map") == {
+        "url": True,
+        "value": "https://en.cppreference.com/w/cpp/container/map",
+    }
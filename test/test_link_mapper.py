@@ -55,6 +55,22 @@ def test_split_cpptype():
 
     assert result == expected
 
+    # "long int" is merged before "long long int" is tried
+    result = wurfapi.link_mapper.split_cpptype("\tlong long int&")
+
+    assert result == ["\t", "long", " ", "long int", "&"]
+
+    # The result is cached, but each caller gets its own list
+    result.append("*")
+
+    assert wurfapi.link_mapper.split_cpptype("\tlong long int&") == [
+        "\t",
+        "long",
+        " ",
+        "long int",
+        "&",
+    ]
+
 
 def test_split_typelist():
     typelist = [
@@ -149,6 +165,33 @@ def test_linkmapper():
     assert result == expected
 
 
+def test_linkmapper_resolve_once():
+    api = {
+        "ns::a": {"scope": "ns", "type": [{"value": "std::string"}]},
+        "ns::b": {"scope": "ns", "type": [{"value": "const std::string&"}]},
+        "ns::c": {"scope": "ns", "type": [{"value": "std::string"}]},
+    }
+
+    provider = mock.Mock()
+    provider.find_link.return_value = {"url": True, "value": "string.html"}
+
+    mapper = wurfapi.link_mapper.LinkMapper(api=api, link_provider=provider)
+
+    result = mapper.map()
+
+    # The provider is asked once for each distinct token
+    provider.find_link.assert_called_once_with(typename="std::string")
+
+    links = [result[name]["type"][-1] for name in ["ns::a", "ns::c"]]
+
+    assert links[0] == {
+        "value": "std::string",
+        "link": {"url": True, "value": "string.html"},
+    }
+    assert links[0] == links[1]
+    assert links[0]["link"] is not links[1]["link"]
+
+
 def test_split_cppscope():
     cppscope = "std::function"
 
@@ -250,3 +293,57 @@ def test_join_paragraph():
     ]
 
     assert result == expected
+
+
+def test_transform_keys():
+    data = [{"taco": 42, "scope": "a"}, {"salsa": [{"burrito": {"nacho": 1}}]}]
+
+    def map_taco(value, scope):
+        return (value, scope)
+
+    def map_nacho(value, scope):
+        return value + 1
+
+    wurfapi.link_mapper.transform_keys(
+        data=data, functions={"taco": map_taco, "nacho": map_nacho}, scope=None
+    )
+
+    expected = [
+        {"taco": (42, "a"), "scope": "a"},
+        {"salsa": [{"burrito": {"nacho": 2}}]},
+    ]
+
+    assert data == expected
+
+
+def test_linkmapper_in_place():
+    api = {
+        "object": {
+            "scope": "ns",
+            "type": [{"value": "ns::object"}],
+            "briefdescription": [[{"kind": "text", "content": "See ns::object."}]],
+        },
+        "ns::object": {"kind": "class"},
+    }
+
+    provider = mock.Mock()
+    provider.find_link.return_value = None
+
+    mapper = wurfapi.link_mapper.LinkMapper(api=api, link_provider=provider)
+
+    expected = mapper.map()
+    result = mapper.map(in_place=True)
+
+    assert result is api
+    assert result == expected
+    assert result["object"]["briefdescription"] == [
+        [
+            {"kind": "text", "content": "See"},
+            {
+                "kind": "text",
+                "content": "ns::object",
+                "link": {"url": False, "value": "ns::object"},
+            },
+            {"kind": "text", "content": "."},
+        ]
+    ]
@@ -41,3 +41,94 @@ def test_linkprovider():
             "url": True,
             "value": "https://en.cppreference.com/w/cpp/types/integer",
         }
+
+
+def test_linkprovider_user_mappings():
+
+    user_mappings = [
+        {
+            "pattern": "project::(\\w+)::(\\w+)",
+            "link": {"url": True, "value": "https://project.org/{1}/{0}"},
+        }
+    ]
+
+    link_provider = wurfapi.link_provider.LinkProvider(user_mappings=user_mappings)
+
+    # The patterns are combined in one regular expression
+    assert link_provider.regex is not None
+
+    result = link_provider.find_link(typename="project::detail::buffer")
+
+    assert result == {"url": True, "value": "https://project.org/buffer/detail"}
+
+    # The groups of the user mapping do not shift the groups of the default
+    # mappings
+    result = link_provider.find_link(typename="std::map")
+
+    assert result == {
+        "url": True,
+        "value": "https://en.cppreference.com/w/cpp/container/map",
+    }
+
+    # Modifying the result does not change the cached link
+    result["value"] = "changed"
+
+    assert link_provider.find_link(typename="std::map")["value"] != "changed"
+
+    assert link_provider.find_link(typename="project") is None
+
+
+def test_linkprovider_backreference():
+
+    # Backreferences cannot be combined with the other patterns, so the
+    # patterns are matched one by one
+    user_mappings = [
+        {"pattern": "(\\w+)_\\1", "link": {"url": True, "value": "https://{0}.org"}}
+    ]
+
+    link_provider = wurfapi.link_provider.LinkProvider(user_mappings=user_mappings)
+
+    assert link_provider.regex is None
+
+    result = link_provider.find_link(typename="abc_abc")
+
+    assert result == {"url": True, "value": "https://abc.org"}
+
+    result = link_provider.find_link(typename="std::size_t")
+
+    assert result == {
+        "url": True,
+        "value": "https://en.cppreference.com/w/cpp/types/size_t",
+    }
+
+
+def test_linkprovider_cppreference_index():
+
+    link_provider = wurfapi.link_provider.LinkProvider(user_mappings=[])
+
+    result = link_provider.find_link(typename="std::unique_ptr")
+
+    assert result == {
+        "url": True,
+        "value": "https://en.cppreference.com/w/cpp/memory/unique_ptr",
+    }
+
+    result = link_provider.find_link(typename="std::chrono::milliseconds")
+
+    assert result == {
+        "url": True,
+        "value": "https://en.cppreference.com/w/cpp/chrono/duration",
+    }
+
+    # The names are case sensitive
+    assert link_provider.find_link(typename="std::Unique_ptr") is None
+
+    # The bundled index agrees with the default mappings
+    index = wurfapi.link_provider.cppreference_index()
+
+    for typename in ["std::vector", "std::map", "std::string", "std::function"]:
+        mapping, groups = link_provider._match(typename=typename)
+
+        assert index.find_link(typename=typename) == wurfapi.link_provider._format_link(
+            link=link_provider.mappings[mapping]["link"], groups=groups
+        )
@@ -2,6 +2,7 @@ import pytest
 import mock
 import os
 import logging
+import pickle
 import wurfapi.location_mapper
 
 try:
@@ -94,3 +95,39 @@ def test_location_mapper_to_path(testdirectory):
 
     with pytest.raises(RuntimeError):
         mapper.to_path(path=project_dir / "tmp/project_b/src/helloworld.txt")
+
+
+def test_location_mapper_cache(testdirectory):
+
+    log = mock.Mock()
+
+    project_dir = pathlib.Path(
+        testdirectory.copy_dir(directory="test/data/location_mapper").path()
+    )
+
+    # Nested include paths, the first listed is used
+    mapper = wurfapi.location_mapper.LocationMapper(
+        project_root=project_dir / "tmp/project_a",
+        include_paths=[
+            project_dir / "tmp/project_a/src/include",
+            project_dir / "tmp/project_a/src",
+        ],
+        log=log,
+        cache_size=16,
+    )
+
+    header = str(project_dir / "tmp/project_a/src/include/header.h")
+
+    for _ in range(3):
+        assert mapper.to_include(path=header) == "header.h"
+        assert mapper.to_path(path=header) == "src/include/header.h"
+
+    mapper.log_cache_info()
+    log.debug.assert_any_call(
+        "LocationMapper %s cache hits %d misses %d size %d", "include", 2, 1, 1
+    )
+
+    # The mapper can be pickled e.g. to be used in a worker process
+    mapper.log = None
+    mapper = pickle.loads(pickle.dumps(mapper))
+    assert mapper.to_include(path=header) == "header.h"
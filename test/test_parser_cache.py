@@ -0,0 +1,48 @@
+import mock
+import os
+
+import wurfapi
+import wurfapi.parser_cache
+
+
+def test_parser_cache(testdirectory):
+
+    xml_dir = testdirectory.mkdir("xml")
+    xml_dir.write_text(filename="classproj.xml", data="<doxygen/>", encoding="utf-8")
+    xml_path = os.path.join(xml_dir.path(), "classproj.xml")
+
+    cache = wurfapi.parser_cache.ParserCache(
+        cache_path=os.path.join(testdirectory.path(), "cache"), log=mock.Mock()
+    )
+
+    first_key = cache.key(xml_path=xml_path, configuration="parser-1")
+
+    assert first_key == cache.key(xml_path=xml_path, configuration="parser-1")
+    assert first_key != cache.key(xml_path=xml_path, configuration="parser-2")
+    assert cache.lookup(key=first_key) is None
+
+    # References into the API must survive the round trip
+    link = {"url": False, "value": "classproj"}
+    fragment = ({"proj": {"link": link}}, {"classproj": "proj"}, [(link, "value")])
+
+    cache.store(key=first_key, fragment=fragment)
+
+    api, id_mapping, references = cache.lookup(key=first_key)
+    assert api == fragment[0]
+    assert id_mapping == fragment[1]
+    assert references[0][0] is api["proj"]["link"]
+
+    # Changing the XML changes the key
+    xml_dir.write_text(
+        filename="classproj.xml", data="<doxygen></doxygen>", encoding="utf-8"
+    )
+
+    second_key = cache.key(xml_path=xml_path, configuration="parser-1")
+    assert second_key != first_key
+
+    cache.store(key=second_key, fragment=fragment)
+
+    # Pruning removes the entries not used
+    cache.prune(keys=[second_key])
+    assert cache.lookup(key=first_key) is None
+    assert cache.lookup(key=second_key) is not None
@@ -0,0 +1,114 @@
+import os
+
+import mock
+
+import wurfapi.prerender
+import wurfapi.render_cache
+import wurfapi.template_render
+
+DOCUMENT = """
+Coder
+=====
+
+.. wurfapi:: class_synopsis.rst
+    :selector: project::coder
+
+* A list with a directive
+
+  .. wurfapi:: function_synopsis
+     .rst
+     :selector: project::coder
+     :user_data: some data
+
+.. wurfapi:: namespace_synopsis.rst
+
+    :selector: not an option, the options end at the blank line
+
+.. note:: Not a wurfapi directive
+"""
+
+
+def test_read_directives():
+
+    assert wurfapi.prerender.read_directives(text=DOCUMENT) == [
+        ("class_synopsis.rst", "project::coder", None),
+        ("function_synopsis.rst", "project::coder", "some data"),
+        ("namespace_synopsis.rst", None, None),
+    ]
+
+
+def test_find_directives(testdirectory):
+
+    testdirectory.write_text(filename="index.rst", data=DOCUMENT, encoding="utf-8")
+
+    docs = testdirectory.mkdir("docs")
+    docs.write_text(
+        filename="coder.rst",
+        data=".. wurfapi:: class_synopsis.rst\n    :selector: project::coder\n",
+        encoding="utf-8",
+    )
+    docs.write_text(
+        filename="coder.txt",
+        data=".. wurfapi:: other.rst\n",
+        encoding="utf-8",
+    )
+
+    build = testdirectory.mkdir("_build")
+    build.write_text(filename="old.rst", data=DOCUMENT, encoding="utf-8")
+
+    directives = wurfapi.prerender.find_directives(
+        srcdir=testdirectory.path(),
+        suffixes=[".rst"],
+        exclude=lambda path: path == "_build",
+    )
+
+    # The same directive in several documents is only rendered once
+    assert directives == wurfapi.prerender.read_directives(text=DOCUMENT)
+
+
+def test_prerender(testdirectory):
+
+    templates = testdirectory.mkdir("templates")
+    templates.write_text(
+        filename="name.rst", data="{{ api[selector].name }}", encoding="utf-8"
+    )
+
+    api = {
+        "project::coder": {"name": "coder"},
+        "project::decoder": {"name": "decoder"},
+    }
+
+    cache_path = os.path.join(testdirectory.path(), "cache")
+
+    counts = wurfapi.prerender.prerender(
+        directives=[
+            ("name.rst", "project::coder", None),
+            ("name.rst", "project::decoder", None),
+            ("name.rst", "project::missing", None),
+        ],
+        api=api,
+        user_path=templates.path(),
+        cache_path=cache_path,
+        template_cache_path=os.path.join(testdirectory.path(), "templates_cache"),
+        workers=2,
+    )
+
+    assert counts == {"hits": 0, "misses": 2, "failures": 1}
+
+    # The directives find the rendered rst in the cache
+    cache = wurfapi.render_cache.RenderCache(
+        cache_path=cache_path, api=api, log=mock.Mock()
+    )
+
+    template = wurfapi.template_render.TemplateRender(user_path=templates.path())
+
+    for selector, name in [
+        ("project::coder", "coder"),
+        ("project::decoder", "decoder"),
+    ]:
+        data, _ = cache.render(
+            template=template, selector=selector, filename="name.rst"
+        )
+        assert data == name
+
+    assert (cache.hits, cache.misses) == (2, 0)
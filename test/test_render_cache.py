@@ -0,0 +1,135 @@
+import os
+import copy
+
+import mock
+
+import wurfapi.render_cache
+import wurfapi.template_render
+
+API = {
+    "project": {"kind": "namespace", "name": "project"},
+    "project::coder": {"kind": "class", "name": "coder"},
+    "project::other": {"kind": "class", "name": "other"},
+}
+
+
+def render(testdirectory, api, filename, selector=None):
+
+    cache = wurfapi.render_cache.RenderCache(
+        cache_path=os.path.join(testdirectory.path(), "cache"), api=api, log=mock.Mock()
+    )
+
+    template = wurfapi.template_render.TemplateRender(
+        user_path=os.path.join(testdirectory.path(), "templates")
+    )
+
+    data, _ = cache.render(template=template, selector=selector, filename=filename)
+
+    return data, (cache.hits, cache.misses)
+
+
+def test_render_cache(testdirectory):
+
+    templates = testdirectory.mkdir("templates")
+    templates.write_text(
+        filename="name.rst", data="{{ api[selector].name }}", encoding="utf-8"
+    )
+
+    api = copy.deepcopy(API)
+
+    assert render(testdirectory, api, "name.rst", "project::coder") == ("coder", (0, 1))
+    assert render(testdirectory, api, "name.rst", "project::coder") == ("coder", (1, 0))
+
+    # Changing an entry not used by the template
+    api["project::other"]["name"] = "changed"
+    assert render(testdirectory, api, "name.rst", "project::coder") == ("coder", (1, 0))
+
+    # Changing the entry used by the template
+    api["project::coder"]["name"] = "encoder"
+    assert render(testdirectory, api, "name.rst", "project::coder") == (
+        "encoder",
+        (0, 1),
+    )
+
+    # Changing the template
+    templates.write_text(
+        filename="name.rst", data="name {{ api[selector].name }}", encoding="utf-8"
+    )
+    assert render(testdirectory, api, "name.rst", "project::coder") == (
+        "name encoder",
+        (0, 1),
+    )
+
+
+def test_render_cache_everything(testdirectory):
+
+    templates = testdirectory.mkdir("templates")
+    templates.write_text(
+        filename="classes.rst",
+        data='{{ api | api_filter(kind="class") | join(",") }}',
+        encoding="utf-8",
+    )
+
+    api = copy.deepcopy(API)
+    expect = "project::coder,project::other"
+
+    assert render(testdirectory, api, "classes.rst") == (expect, (0, 1))
+    assert render(testdirectory, api, "classes.rst") == (expect, (1, 0))
+
+    # The template iterates over the API, so any change is a miss
+    api["project"]["name"] = "changed"
+    assert render(testdirectory, api, "classes.rst") == (expect, (0, 1))
+
+
+def test_render_cache_prune(testdirectory):
+
+    templates = testdirectory.mkdir("templates")
+    templates.write_text(
+        filename="name.rst", data="{{ api[selector].name }}", encoding="utf-8"
+    )
+
+    cache = wurfapi.render_cache.RenderCache(
+        cache_path=os.path.join(testdirectory.path(), "cache"),
+        api=copy.deepcopy(API),
+        log=mock.Mock(),
+    )
+
+    template = wurfapi.template_render.TemplateRender(user_path=templates.path())
+
+    keys = {}
+    for selector in ["project::coder", "project::other"]:
+        _, keys[selector] = cache.render(
+            template=template, selector=selector, filename="name.rst"
+        )
+
+    # Pruning removes the entries not used
+    cache.prune(keys=[keys["project::coder"]])
+
+    assert cache.lookup(key=keys["project::coder"]) is not None
+    assert cache.lookup(key=keys["project::other"]) is None
+
+
+def test_render_cache_scopes(testdirectory):
+
+    templates = testdirectory.mkdir("templates")
+    templates.write_text(
+        filename="descendants.rst",
+        data='{{ "project" | api_descendants | join(",") }}',
+        encoding="utf-8",
+    )
+
+    api = copy.deepcopy(API)
+    api["project"]["members"] = ["project::coder"]
+
+    expect = "project::coder"
+
+    assert render(testdirectory, api, "descendants.rst") == (expect, (0, 1))
+    assert render(testdirectory, api, "descendants.rst") == (expect, (1, 0))
+
+    # An entry placed in the namespace by its scope only
+    api["project::added"] = {"kind": "class", "name": "added", "scope": "project"}
+
+    assert render(testdirectory, api, "descendants.rst") == (
+        expect + ",project::added",
+        (0, 1),
+    )
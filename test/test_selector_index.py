@@ -0,0 +1,49 @@
+import pytest
+
+import wurfapi.selector_index
+import wurfapi.collapse_inline_namespaces
+
+
+def test_selector_index():
+
+    selectors = [
+        "project",
+        "project::coder",
+        "project::coder::encode",
+        "project::coder::decode",
+        "project::decoder",
+        "project::decoder::decode",
+        "other::coder",
+    ]
+
+    index = wurfapi.selector_index.SelectorIndex(selectors=selectors)
+
+    assert index.suggest(selector="project::coder::encod", count=1) == [
+        "project::coder::encode"
+    ]
+
+    assert index.suggest(selector="Project::Decoder", count=2) == [
+        "project::decoder",
+        "project::decoder::decode",
+    ]
+
+    # Only the selectors sharing part of the name are suggested
+    assert index.suggest(selector="xyz") == []
+    assert index.suggest(selector="") == []
+
+    assert len(index.suggest(selector="coder")) == 5
+
+
+def test_selector_index_error():
+
+    api = {
+        "project::v1": {"kind": "namespace", "inline": True},
+        "project::v1::coder": {"kind": "class", "scope": "project::v1"},
+    }
+
+    with pytest.raises(RuntimeError) as error:
+        wurfapi.collapse_inline_namespaces.collapse_inline_namespaces(
+            api=api, selectors=["project::v2"]
+        )
+
+    assert "Closest matches are: ['project::v1'" in str(error.value)
@@ -1,6 +1,7 @@
 import os
 import mock
 import json
+import pytest
 
 import wurfapi
 import wurfapi.doxygen_generator
@@ -187,7 +188,8 @@ def test_template_render_multiple_functions(testdirectory, datarecorder):
 
     datarecorder.record_data(
         data=data,
-        recording_file="test/data/template_recordings/builtin_multiple_function_synopsis.rst",
+        recording_file="test/data/template_recordings/"
+        "builtin_multiple_function_synopsis.rst",
     )
 
 
@@ -202,7 +204,8 @@ def test_template_render_free_function(testdirectory, datarecorder):
 
     datarecorder.record_data(
         data=data,
-        recording_file="test/data/template_recordings/builtin_free_function_synopsis.rst",
+        recording_file="test/data/template_recordings/"
+        "builtin_free_function_synopsis.rst",
     )
 
 
@@ -221,3 +224,133 @@ def test_template_render_macro(datarecorder):
     datarecorder.record_data(
         data=data, recording_file="test/data/template_recordings/macro_escape_ref.rst"
     )
+
+
+def test_template_render_bytecode_cache(testdirectory):
+
+    testdirectory.write_text(
+        filename="user.rst", data="{{ api[selector].name }}", encoding="utf-8"
+    )
+
+    api = {"project::coder": {"name": "coder"}}
+    cache_path = os.path.join(testdirectory.path(), "cache")
+
+    template = wurfapi.template_render.TemplateRender(
+        user_path=testdirectory.path(), cache_path=cache_path
+    )
+
+    assert template.render(selector="project::coder", api=api, filename="user.rst") == (
+        "coder"
+    )
+    assert len(os.listdir(cache_path)) == 1
+
+    # A changed template is compiled again
+    testdirectory.write_text(
+        filename="user.rst", data="name: {{ api[selector].name }}", encoding="utf-8"
+    )
+
+    template = wurfapi.template_render.TemplateRender(
+        user_path=testdirectory.path(), cache_path=cache_path
+    )
+
+    assert template.render(selector="project::coder", api=api, filename="user.rst") == (
+        "name: coder"
+    )
+
+
+def test_template_render_api_filters(testdirectory):
+
+    api = {
+        "a": {"kind": "function", "access": "public", "location": {"line": 3}},
+        "b": {"kind": "variable", "access": "private", "location": {"line": 1}},
+        "c": {"kind": "function", "access": "private", "location": {"line": 2}},
+        "d": {"kind": "function", "access": "public", "location": {"line": 4}},
+        "e": {"kind": "using", "location": {"line": 5}},
+    }
+
+    testdirectory.write_text(
+        filename="filters.rst",
+        data="{{ api[selector].members"
+        ' | api_filter(kind="function", access="public") }}\n'
+        '{{ api[selector].members | api_filter(kind=["function", "using"]) }}\n'
+        '{{ api[selector].members | api_filter(access="protected") }}\n'
+        '{{ api[selector].members | api_sort(keys=["location", "line"]) }}\n'
+        "{% for access, group in api[selector].members | api_group_by("
+        '"access", default="none") %}'
+        "{{ access }}: {{ group }} {% endfor %}",
+        encoding="utf-8",
+    )
+
+    template = wurfapi.template_render.TemplateRender(user_path=testdirectory.path())
+    api["all"] = {"kind": "namespace", "members": ["e", "d", "c", "b", "a"]}
+
+    data = template.render(selector="all", api=api, filename="filters.rst")
+
+    assert data.splitlines() == [
+        "['d', 'a']",
+        "['e', 'd', 'c', 'a']",
+        "[]",
+        "['b', 'c', 'a', 'd', 'e']",
+        "none: ['e'] public: ['d', 'a'] private: ['c', 'b'] ",
+    ]
+
+    # Selectors not in the API are an error
+    api["all"]["members"] = ["a", "missing"]
+
+    with pytest.raises(KeyError):
+        template.render(selector="all", api=api, filename="filters.rst")
+
+
+def test_template_render_scope_filters(testdirectory):
+
+    api = {
+        "project": {"kind": "namespace", "scope": None, "members": ["project::coder"]},
+        "project::coder": {
+            "kind": "class",
+            "access": "public",
+            "scope": "project",
+            "members": ["project::coder::encode()", "project::coder::state"],
+        },
+        "project::coder::encode()": {
+            "kind": "function",
+            "access": "public",
+            "scope": "project::coder",
+        },
+        "project::coder::state": {
+            "kind": "class",
+            "access": "private",
+            "scope": "project::coder",
+            "members": ["project::coder::state::reset()"],
+        },
+        "project::coder::state::reset()": {
+            "kind": "function",
+            "access": "public",
+            "scope": "project::coder::state",
+        },
+        # Not listed as a member, so placed using its scope
+        "project::make_coder()": {"kind": "function", "scope": "project"},
+    }
+
+    testdirectory.write_text(
+        filename="scopes.rst",
+        data="{{ selector | api_descendants }}\n"
+        '{{ selector | api_descendants(kind="function") }}\n'
+        '{{ selector | api_descendants(kind="class", access="public") }}\n'
+        '{{ "project::coder::state::reset()" | api_ancestors }}\n'
+        '{{ "project::coder::state::reset()" | api_ancestors(kind="namespace") }}',
+        encoding="utf-8",
+    )
+
+    template = wurfapi.template_render.TemplateRender(user_path=testdirectory.path())
+
+    data = template.render(selector="project", api=api, filename="scopes.rst")
+
+    assert data.splitlines() == [
+        "['project::coder', 'project::coder::encode()', 'project::coder::state', "
+        "'project::coder::state::reset()', 'project::make_coder()']",
+        "['project::coder::encode()', 'project::coder::state::reset()', "
+        "'project::make_coder()']",
+        "['project::coder']",
+        "['project::coder::state', 'project::coder', 'project']",
+        "['project']",
+    ]